@@ -0,0 +1,102 @@
+"""
+Counts Supabase round trips made by GET /api/groups/teacher-groups as the
+number of groups a teacher owns grows.
+
+No network or database is needed: the real Supabase client is pointed at an
+in-memory transport that answers every PostgREST request with N synthetic
+rows and records how many requests were made.
+
+    python -m benchmarks.teacher_groups_roundtrips
+"""
+import json
+import time
+import uuid
+
+import httpx
+from flask import Flask
+from supabase import create_client
+
+from routes.group import group_bp
+
+
+GROUP_COUNTS = (1, 10, 40, 160)
+SEMESTER_ID = str(uuid.uuid4())
+MEMBER_COUNT = 30
+
+
+def synthetic_group(number):
+    """A groups row as embedded by TEACHER_GROUPS_SELECT, with its group_stats projection."""
+    return {
+        "id": str(uuid.uuid4()),
+        "subject_name": f"Subject {number}",
+        "group_type": "group",
+        "semester_id": SEMESTER_ID,
+        "stats": {
+            "member_count": MEMBER_COUNT,
+            "message_count": 100 + number,
+            "last_activity": f"2025-01-01T00:00:{number % 60:02d}+00:00",
+        },
+    }
+
+
+def make_handler(group_count, requests_seen):
+    groups = [synthetic_group(number) for number in range(group_count)]
+
+    def handler(request):
+        requests_seen.append(request.url)
+        table = request.url.path.rsplit("/", 1)[-1]
+        if table == "teachers":
+            rows = [{"id": str(uuid.uuid4()), "groups": groups}]
+        elif table == "groups":
+            rows = groups
+        elif table == "semesters":
+            rows = [{"id": SEMESTER_ID, "semester_number": 3}]
+        else:
+            raise AssertionError(f"Unexpected request to {request.url}")
+        return httpx.Response(200, content=json.dumps(rows), headers={"Content-Range": "0-0/30"})
+
+    return handler
+
+
+def make_app(handler):
+    app = Flask(__name__)
+    app.register_blueprint(group_bp, url_prefix="/api/groups")
+
+    client = create_client("http://supabase.bench", "bench.bench.bench")
+    session = client.postgrest.session
+    client.postgrest.session = httpx.Client(
+        base_url=session.base_url,
+        headers=session.headers,
+        transport=httpx.MockTransport(handler),
+    )
+    app.config["supabase_client"] = client
+    return app
+
+
+def check_payload(groups, group_count):
+    """The response must carry the projected stats, not the zeroed fallback."""
+    assert len(groups) == group_count, groups
+    for group in groups:
+        assert group["student_count"] == MEMBER_COUNT, group
+        assert group["semester_number"] == 3, group
+        assert group["last_activity"] is not None, group
+    activity = [group["last_activity"] for group in groups]
+    assert activity == sorted(activity, reverse=True), activity
+
+
+def main():
+    print(f"{'groups':>8} {'round trips':>12} {'ms':>8}")
+    for group_count in GROUP_COUNTS:
+        requests_seen = []
+        app = make_app(make_handler(group_count, requests_seen))
+        with app.test_client() as client:
+            started = time.perf_counter()
+            response = client.get("/api/groups/teacher-groups?user_id=bench")
+            elapsed = (time.perf_counter() - started) * 1000
+        assert response.status_code == 200, response.get_json()
+        check_payload(response.get_json()["groups"], group_count)
+        print(f"{group_count:>8} {len(requests_seen):>12} {elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
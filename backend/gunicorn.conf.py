@@ -0,0 +1,94 @@
+# Production server settings, all overridable from the environment:
+#
+#     gunicorn -c gunicorn.conf.py
+#
+# Run with INGESTION_MODE=worker and start ingest_worker.py separately, so
+# uploads and embedding backfill stay out of the API workers.
+#
+# Message streams are best served by a second server on gevent workers,
+# with the reverse proxy sending /api/messages/stream to it:
+#
+#     WSGI_APP=stream_wsgi:app WEB_WORKER_CLASS=gevent BIND=0.0.0.0:5001 gunicorn -c gunicorn.conf.py
+#
+# Set DATABASE_URL for both servers: live messages then fan out to the
+# streams of every process (see routes/realtime.py), not just the one that
+# inserted them.
+import os
+import signal
+import multiprocessing
+
+wsgi_app = os.getenv("WSGI_APP", "wsgi:app")
+bind = os.getenv("BIND", "0.0.0.0:5000")
+
+# Processes x threads. Request handling is mostly waiting on Supabase and
+# Gemini, so each process serves several requests on threads. On gthread,
+# every open SSE stream (/api/messages/stream, streamed answers) holds one
+# thread; on gevent (stream server only) it is a greenlet, up to
+# worker_connections per process.
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+# Per-process pools (e.g. HASH_WORKERS) divide the cores by this; workers inherit it
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = os.getenv("WEB_WORKER_CLASS", "gthread")
+threads = int(os.getenv("WEB_THREADS", "8"))
+worker_connections = int(os.getenv("WEB_WORKER_CONNECTIONS", "1000"))
+
+# Workers build their own clients and pools after the fork; nothing network-
+# or thread-related may be created in the master
+preload_app = False
+
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+# Recycle workers now and then to bound memory growth; 0 disables
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "0"))
+
+accesslog = os.getenv("WEB_ACCESS_LOG", "-")
+
+
+def post_fork(server, worker):
+    """
+    On gevent, makes psycopg2 (the realtime relay) wait through the hub
+    instead of blocking it. Set before the app loads; the app itself is only
+    imported after the worker has monkey-patched the standard library.
+    """
+    if worker_class != "gevent":
+        return
+
+    from psycopg2 import extensions
+    from gevent.socket import wait_read, wait_write
+
+    def wait(connection, timeout=None):
+        while True:
+            state = connection.poll()
+            if state == extensions.POLL_OK:
+                return
+            if state == extensions.POLL_READ:
+                wait_read(connection.fileno(), timeout=timeout)
+            elif state == extensions.POLL_WRITE:
+                wait_write(connection.fileno(), timeout=timeout)
+            else:
+                raise extensions.OperationalError(f"Bad result from poll: {state}")
+
+    extensions.set_wait_callback(wait)
+
+
+def post_worker_init(worker):
+    """Ends SSE streams as soon as a worker starts draining, not at graceful_timeout."""
+    from routes.realtime import broker
+
+    handle_exit = worker.handle_exit
+
+    def on_sigterm(sig, frame):
+        broker.close()
+        handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+
+def worker_exit(server, worker):
+    from run import shutdown_app
+
+    app = getattr(worker, "wsgi", None)
+    if app is not None:
+        shutdown_app(app)
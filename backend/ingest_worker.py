@@ -0,0 +1,53 @@
+import os
+import signal
+import threading
+from dotenv import load_dotenv
+
+# Before the route imports: their settings are read from the environment at import time
+load_dotenv()
+
+from routes.gemini import ingestion_jobs, load_genai
+from routes.embeddings import start_embedding_worker
+from routes.jobs import WORKER_ID
+from routes.clients import create_supabase_client, close_supabase_client
+from routes.realtime import start_relay, stop_relay
+
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+
+def main():
+    """
+    Dedicated ingestion process: claims queued upload jobs from the
+    ingestion_jobs table and backfills message embeddings, so the API
+    processes (run with INGESTION_MODE=worker) never load unstructured,
+    the Gemini SDK or the OCR stack for ingestion.
+    """
+    supabase = create_supabase_client(SUPABASE_URL, SUPABASE_KEY)
+    load_genai()  # Fail fast on a missing GEMINI_API_KEY
+    # Uploaded chunks are announced through the relay (DATABASE_URL); this
+    # process has no stream subscribers of its own
+    if start_relay(supabase) is None:
+        print("DATABASE_URL is not set: ingested chunks will not reach open message streams")
+
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopped.set())
+
+    embedding_worker = start_embedding_worker(supabase)
+    print(f"Ingestion worker {WORKER_ID} started")
+    try:
+        ingestion_jobs.serve(supabase, stopped)
+    finally:
+        # Running jobs finish; queued ones stay queued for the next worker, and
+        # a kill before they finish is covered by the job lease
+        embedding_worker.stop()
+        ingestion_jobs.shutdown(wait=True)
+        stop_relay()
+        close_supabase_client(supabase)
+        print(f"Ingestion worker {WORKER_ID} stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+import re
+import hashlib
+import unicodedata
+from datetime import datetime, timedelta, timezone
+
+
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Minimum cosine similarity between two questions to reuse an answer
+ANSWER_CACHE_MIN_SIMILARITY = float(os.getenv("ANSWER_CACHE_MIN_SIMILARITY", "0.92"))
+
+
+def normalize_query(query):
+    """Case, whitespace and trailing punctuation insensitive form of a question."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = re.sub(r"\s+", " ", query).strip()
+    return query.rstrip("?!.。 ")
+
+
+def query_hash(query):
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+def _cutoff():
+    return (datetime.now(timezone.utc) - timedelta(seconds=ANSWER_CACHE_TTL_SECONDS)).isoformat()
+
+
+def find_exact_answer(supabase, group_id, hashed_query):
+    """Returns a fresh cached answer for the same normalized question in this group, or None."""
+    response = (
+        supabase.table("answers")
+        .select("answers")
+        .eq("group_id", group_id)
+        .eq("query_hash", hashed_query)
+        .eq("stale", False)
+        .gte("created_at", _cutoff())
+        .order("created_at", desc=True)
+        .limit(1)
+        .execute()
+    )
+    return response.data[0]["answers"] if response.data else None
+
+
+def find_similar_answer(supabase, group_id, query_embedding):
+    """Returns a fresh cached answer to a near-identical question in this group, or None."""
+    if not query_embedding:
+        return None
+    response = supabase.rpc("match_answers", {
+        "query_embedding": query_embedding,
+        "p_group_id": group_id,
+        "match_threshold": ANSWER_CACHE_MIN_SIMILARITY,
+        "p_since": _cutoff(),
+    }).execute()
+    return response.data[0]["answers"] if response.data else None
+
+
+def invalidate_group_answers(supabase, group_id):
+    """Marks a group's cached answers stale, e.g. after new material was uploaded."""
+    try:
+        supabase.table("answers").update({"stale": True}).eq("group_id", group_id).eq("stale", False).execute()
+    except Exception as e:
+        print(f"Error in invalidate_group_answers: {e}")
@@ -1,12 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app
 import uuid
-import bcrypt
 import re
+from routes.passwords import password_hasher, HasherBusy
+from routes.session import issue_token, ROLE_TABLES, SESSION_TOKEN_MAX_AGE
 
 auth_bp = Blueprint("auth", __name__)
 
-SALT_ROUNDS = 12
-
 
 def validate_email(email):
 
@@ -20,6 +19,14 @@ def validate_password(password):
     return re.match(pattern, password) is not None
 
 
+def busy_response(e):
+    return (
+        jsonify({"message": "Server busy, please retry", "errors": [str(e)]}),
+        503,
+        {"Retry-After": str(e.retry_after)},
+    )
+
+
 @auth_bp.route("/signup", methods=["POST"])
 def signup():
     supabase = current_app.config["supabase_client"]
@@ -94,8 +101,6 @@ def signup():
                 400,
             )
 
-        hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(SALT_ROUNDS)).decode("utf-8")
-
         users_result = supabase.table("users").select("email").eq("email", email).execute()
 
         if users_result.data:
@@ -111,6 +116,8 @@ def signup():
                 409,
             )  
 
+        # Hashed after the duplicate check, so rejected signups cost no bcrypt time
+        hashed_password = password_hasher.hash(password)
 
         user_id = str(uuid.uuid4())  
         user_data = {
@@ -192,6 +199,8 @@ def signup():
                         }                    
                         }), 201  
 
+    except HasherBusy as e:
+        return busy_response(e)
     except Exception as e:
         return (
             jsonify({"message": "Internal server error", "errors": [str(e)]}),
@@ -235,7 +244,10 @@ def login():
             )
 
         
-        user_query = supabase.table("users").select("*").eq("email", email).execute()
+        # The teacher/student row comes embedded, for the session token
+        user_query = supabase.table("users").select(
+            "*, teachers(*), students(*)"
+        ).eq("email", email).execute()
         user_data = user_query.data[0] if user_query.data else None
 
         if not user_data:
@@ -251,7 +263,7 @@ def login():
 
         
         hashed_password = user_data["password_hash"]
-        if not bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8")):
+        if not password_hasher.verify(password, hashed_password):
             return (
                 jsonify(
                     {
@@ -264,6 +276,15 @@ def login():
 
         user_id = user_data["id"]
         role = user_data["role"]
+
+        if password_hasher.needs_rehash(hashed_password):
+            # The configured cost changed; upgrade the stored hash off the request path
+            password_hasher.rehash_later(
+                password,
+                lambda new_hash: supabase.table("users").update(
+                    {"password_hash": new_hash}
+                ).eq("id", user_id).execute(),
+            )
         additional_data = {}
 
         if current_role and current_role != role:
@@ -274,21 +295,13 @@ def login():
                 ), 401
             
         
-        if role == "student":
-            student_query = supabase.table("students").select("*").eq("user_id", user_id).execute()
-            student_data = student_query.data[0] if student_query.data else {}
-            student_data.pop("user_id", None)
-            student_data.pop("id", None)
-
-        elif role == "teacher":
-            teacher_query = supabase.table("teachers").select("*").eq("user_id", user_id).execute()
-            teacher_data = teacher_query.data[0] if teacher_query.data else {}
-            teacher_data.pop("user_id", None)
-            teacher_data.pop("id", None)
-        else:
-            additional_data = {}
-
-       
+        role_rows = {table: user_data.pop(table, None) or [] for table in ROLE_TABLES.values()}
+        role_id = None
+        if role in ROLE_TABLES and role_rows[ROLE_TABLES[role]]:
+            role_data = dict(role_rows[ROLE_TABLES[role]][0])
+            role_id = role_data.pop("id", None)
+            role_data.pop("user_id", None)
+            additional_data = {**role_data, f"{role}_id": role_id}
 
         user_data.pop("password_hash", None)  
 
@@ -296,9 +309,13 @@ def login():
             {
                 "message": "Login successful",
                 "user": {**user_data, **additional_data},  
+                "token": issue_token(user_id, role, role_id),
+                "expires_in": SESSION_TOKEN_MAX_AGE,
             }
         ), 200
 
+    except HasherBusy as e:
+        return busy_response(e)
     except Exception as e:
         return (
             jsonify({"message": "Internal server error", "errors": [str(e)]}),
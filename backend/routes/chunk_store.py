@@ -0,0 +1,101 @@
+import os
+import json
+import uuid
+import hashlib
+import numpy as np
+
+
+CHUNK_STORE_DIR = os.getenv("CHUNK_STORE_DIR", "./chunk_store")
+
+
+def document_fingerprint(file_path, settings):
+    """SHA-256 of the file bytes plus the settings that shaped its chunks and embeddings."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ChunkWriter:
+    """Streams (content, embedding) chunks to temporary files; commit() publishes them."""
+
+    def __init__(self, base):
+        self.base = base
+        self.count = 0
+        self.dim = None
+        # Unique temp names: the same document may be ingested twice concurrently
+        self._tmp = f"{base}.{uuid.uuid4().hex}"
+        self._contents = open(f"{self._tmp}.jsonl", "wb")
+        self._vectors = open(f"{self._tmp}.f32", "wb")
+
+    def add(self, content, embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        if self.dim is None:
+            self.dim = vector.shape[0]
+        self._vectors.write(vector.tobytes())
+        self._contents.write(json.dumps(content).encode("utf-8") + b"\n")
+        self.count += 1
+
+    def commit(self, pages):
+        self._contents.close()
+        self._vectors.close()
+        if not self.count:
+            return self.discard()
+        os.replace(f"{self._tmp}.jsonl", f"{self.base}.jsonl")
+        os.replace(f"{self._tmp}.f32", f"{self.base}.f32")
+        # The header goes last: load() ignores documents without one
+        with open(f"{self._tmp}.json", "w") as f:
+            json.dump({"pages": pages, "count": self.count, "dim": self.dim}, f)
+        os.replace(f"{self._tmp}.json", f"{self.base}.json")
+
+    def discard(self):
+        self._contents.close()
+        self._vectors.close()
+        for suffix in (".jsonl", ".f32"):
+            if os.path.exists(f"{self._tmp}{suffix}"):
+                os.remove(f"{self._tmp}{suffix}")
+
+
+class ChunkStore:
+    """
+    Parsed chunks and their embeddings of previously ingested documents,
+    keyed by document fingerprint:
+        <fingerprint>.json    {"pages", "count", "dim"}
+        <fingerprint>.jsonl   one JSON string per chunk content
+        <fingerprint>.f32     float32 embeddings, one row per chunk
+    """
+
+    def __init__(self, directory=CHUNK_STORE_DIR):
+        self.directory = directory
+
+    def _base(self, fingerprint):
+        return os.path.join(self.directory, fingerprint)
+
+    def load(self, fingerprint):
+        """
+        Returns (pages, count, chunks) where chunks lazily yields
+        (content, embedding), or None when the document is unknown.
+        """
+        base = self._base(fingerprint)
+        try:
+            with open(f"{base}.json") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        def chunks():
+            vectors = np.memmap(f"{base}.f32", dtype=np.float32, mode="r", shape=(meta["count"], meta["dim"]))
+            with open(f"{base}.jsonl", "rb") as f:
+                for index, line in enumerate(f):
+                    yield json.loads(line), vectors[index].tolist()
+
+        return meta["pages"], meta["count"], chunks()
+
+    def writer(self, fingerprint):
+        os.makedirs(self.directory, exist_ok=True)
+        return ChunkWriter(self._base(fingerprint))
+
+
+chunk_store = ChunkStore()
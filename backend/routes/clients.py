@@ -0,0 +1,44 @@
+import os
+import httpx
+from postgrest.utils import SyncClient
+from supabase import create_client, ClientOptions
+
+
+# Explicit timeouts: a stalled Supabase connection fails fast instead of
+# holding a request thread for the library default
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+SUPABASE_READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", "30"))
+# Keep-alive connections per process: one per request thread plus the background workers
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", str(int(os.getenv("WEB_THREADS", "8")) + 4)))
+SUPABASE_KEEPALIVE_SECONDS = float(os.getenv("SUPABASE_KEEPALIVE_SECONDS", "60"))
+
+
+def create_supabase_client(url, key):
+    """
+    A Supabase client whose PostgREST calls share one pooled keep-alive
+    HTTP/2 session with connect/read timeouts. Create one per process,
+    after forking; the session is safe to share between threads.
+    """
+    timeout = httpx.Timeout(SUPABASE_READ_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT)
+    client = create_client(url, key, options=ClientOptions(postgrest_client_timeout=timeout))
+
+    session = client.postgrest.session
+    client.postgrest.session = SyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=SUPABASE_POOL_SIZE,
+            max_keepalive_connections=SUPABASE_POOL_SIZE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_SECONDS,
+        ),
+        follow_redirects=True,
+        http2=True,
+    )
+    session.close()
+    return client
+
+
+def close_supabase_client(client):
+    """Closes the pooled connections of a client from create_supabase_client()."""
+    client.postgrest.session.close()
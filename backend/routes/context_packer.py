@@ -0,0 +1,82 @@
+import os
+import math
+import threading
+from datetime import datetime
+from cachetools import LRUCache
+from routes.answer_cache import normalize_query
+
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))
+# Chunks shorter than this carry no useful context ("Page 3", stray headers)
+MIN_CHUNK_TOKENS = int(os.getenv("MIN_CHUNK_TOKENS", "4"))
+# How much a chunk's age among the candidates (0 oldest .. 1 newest) adds to its score
+RECENCY_WEIGHT = float(os.getenv("CONTEXT_RECENCY_WEIGHT", "0.05"))
+# Gemini averages roughly four characters per token for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def parse_timestamp(value):
+    """Seconds since the epoch of an ISO timestamp, or None."""
+    try:
+        return datetime.fromisoformat(value).timestamp() if value else None
+    except ValueError:
+        return None
+
+
+class ContextPacker:
+    """
+    Turns retrieved chunks into prompt context that fits a token budget.
+
+    Per-chunk work (dedupe key, token count) is memoized by chunk id, as
+    chunks recur across questions; the ranking depends on each query's
+    scores and is recomputed per call.
+    """
+
+    def __init__(self, budget=CONTEXT_TOKEN_BUDGET):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._chunk_info = LRUCache(maxsize=100_000)
+
+    def _info(self, chunk_id, content):
+        with self._lock:
+            info = self._chunk_info.get(chunk_id)
+        if info is None:
+            info = (normalize_query(content), estimate_tokens(content))
+            with self._lock:
+                self._chunk_info[chunk_id] = info
+        return info
+
+    def pack(self, candidates):
+        """
+        candidates are (id, content, score, timestamp) tuples, timestamp being
+        the message's ISO timestamp or None if unknown. Chunks are taken by
+        relevance, nudged by recency, skipping near-empty chunks and
+        duplicates, until the budget is spent.
+        """
+        ages = {c[0]: parse_timestamp(c[3]) for c in candidates}
+        known = [age for age in ages.values() if age is not None]
+        oldest = min(known, default=0)
+        span = (max(known, default=0) - oldest) or 1
+
+        def rank(candidate):
+            age = ages[candidate[0]]
+            recency = (age - oldest) / span if age is not None else 0
+            return candidate[2] + RECENCY_WEIGHT * recency
+
+        used, seen, parts = 0, set(), []
+        for chunk_id, content, _, _ in sorted(candidates, key=rank, reverse=True):
+            key, tokens = self._info(chunk_id, content)
+            if tokens < MIN_CHUNK_TOKENS or key in seen or used + tokens > self.budget:
+                continue
+            seen.add(key)
+            parts.append(content)
+            used += tokens
+
+        return "\n\n".join(parts)
+
+
+context_packer = ContextPacker()
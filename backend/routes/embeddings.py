@@ -0,0 +1,108 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from routes.gemini import get_embeddings
+from routes.vector_index import vector_index
+
+
+POLL_INTERVAL_SECONDS = 5
+BATCH_SIZE = 50
+MAX_BACKOFF_SECONDS = 300
+MAX_ATTEMPTS = 8
+# How long a claimed batch is hidden from other workers
+CLAIM_LEASE_SECONDS = 300
+
+
+class EmbeddingWorker(threading.Thread):
+    """
+    Backfills the messages.embedding column in the background.
+
+    Rows with embedding_status = 'pending' are the outbox (see
+    sql/embedding_outbox.sql): they survive restarts, so the worker simply
+    picks them up again. Failure backoff is stored on the row, so rows
+    waiting to be retried never hold up the rows behind them. Batches are
+    claimed with a lease (claim_pending_embeddings), so several workers
+    never embed the same row.
+    """
+
+    def __init__(self, supabase, interval=POLL_INTERVAL_SECONDS, batch_size=BATCH_SIZE):
+        super().__init__(name="embedding-worker", daemon=True)
+        self.supabase = supabase
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def notify(self):
+        """Wakes the worker right away, e.g. after a message was sent."""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                self.process_pending()
+            except Exception as e:
+                print(f"Error in EmbeddingWorker: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def process_pending(self):
+        """Claims and embeds one batch of due pending messages. Returns the number embedded."""
+        now = datetime.now(timezone.utc)
+        response = self.supabase.rpc("claim_pending_embeddings", {
+            "p_limit": self.batch_size,
+            "p_lease_seconds": CLAIM_LEASE_SECONDS,
+        }).execute()
+
+        rows = []
+        for row in response.data or []:
+            if (row.get("content") or "").strip():
+                rows.append(row)
+            else:
+                self._mark(row["id"], {"embedding_status": "skipped"})
+        if not rows:
+            return 0
+
+        # One API call for the whole batch; a failed call retries every row
+        try:
+            embeddings = get_embeddings([row["content"] for row in rows])
+            batch_error = None
+        except Exception as e:
+            embeddings, batch_error = [], e
+
+        embedded = 0
+        for index, row in enumerate(rows):
+            message_id = row["id"]
+            embedding = embeddings[index] if index < len(embeddings) else None
+            if embedding:
+                self._mark(message_id, {"embedding": embedding, "embedding_status": "done"})
+                vector_index.append(row["group_id"], [(message_id, row["content"], embedding, row["timestamp"])])
+                embedded += 1
+                continue
+
+            attempts = (row.get("embedding_attempts") or 0) + 1
+            delay = min(2 ** attempts, MAX_BACKOFF_SECONDS)
+            print(f"Embedding failed for message {message_id} (attempt {attempts}): {batch_error or 'empty embedding'}")
+            self._mark(message_id, {
+                "embedding_attempts": attempts,
+                "embedding_next_attempt": (now + timedelta(seconds=delay)).isoformat(),
+                "embedding_status": "failed" if attempts >= MAX_ATTEMPTS else "pending",
+            })
+
+        return embedded
+
+    def _mark(self, message_id, fields):
+        try:
+            self.supabase.table("messages").update(fields).eq("id", message_id).execute()
+        except Exception as e:
+            print(f"Error updating embedding state of message {message_id}: {e}")
+
+
+def start_embedding_worker(supabase):
+    """Starts the background embedding worker and returns it."""
+    worker = EmbeddingWorker(supabase)
+    worker.start()
+    return worker
@@ -1,73 +1,318 @@
 import os
 import uuid
 import json
+import tempfile
+import threading
 import traceback
 import warnings
+from itertools import islice
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
 from werkzeug.utils import secure_filename
-from unstructured.partition.pdf import partition_pdf
-from supabase import create_client
-import google.generativeai as genai
-import pytesseract  # OCR tool
-import PIL
+from routes.realtime import publish_messages, sse_event
+from routes.group_stats import bump_group_stats
+from routes.vector_index import vector_index
+from routes.answer_cache import query_hash, find_exact_answer, find_similar_answer, invalidate_group_answers
+from routes.jobs import IngestionJobs, get_job
+from routes.chunk_store import chunk_store, document_fingerprint
+from routes.pdf_partition import partition_pages, MIN_TEXT_LAYER_CHARS
+from routes.context_packer import context_packer
+from routes.image_ocr import get_ocr_pool, ocr_image, is_allowed_image, OCR_SETTINGS
 
 # Load environment variables
 load_dotenv()
-ocr_agent = pytesseract.image_to_string 
 gemini_bp = Blueprint("gemini", __name__)
 
+# Candidate chunks retrieved per question, and their minimum cosine similarity.
+# The context packer then keeps what fits CONTEXT_TOKEN_BUDGET.
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "24"))
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0.5"))
+
+# Chunks per embedding request (the API accepts up to 100) and rows per insert
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+INSERT_PAGE_SIZE = int(os.getenv("INSERT_PAGE_SIZE", "200"))
+
+# Uploads go to private temp files (system temp dir unless set), never the CWD
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024
+UPLOAD_COPY_BLOCK = 1 << 20
+
+EMBEDDING_MODEL = "models/embedding-001"
+# Deadline per Gemini call (the SDK takes one overall timeout, not connect/read).
+# grpc keeps one multiplexed keep-alive channel per process; "rest" pools HTTP connections.
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "grpc")
+GEMINI_REQUEST_OPTIONS = {"timeout": GEMINI_TIMEOUT_SECONDS}
+# The strategy (fast or hi_res) is chosen per page, see routes/pdf_partition.py
+PARTITION_SETTINGS = {
+    "infer_table_strategy": True,
+}
+CHUNK_SETTINGS = {
+    "max_characters": 1000,
+    "new_after_n_chars": 1500,
+    "combine_text_under_n_chars": 250,
+}
+
+# The Gemini SDK and unstructured are imported on first use, not at startup:
+# most API processes only serve chat and never need the ingestion stack.
+_genai = None
+_gemini_model = None
+_gemini_lock = threading.Lock()
+
+def load_genai():
+    """Imports and configures the Gemini SDK once per process. Returns the module."""
+    global _genai
+    with _gemini_lock:
+        if _genai is None:
+            GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+            # Ensure the GEMINI_API_KEY is set properly
+            if not GEMINI_API_KEY:
+                raise ValueError("GEMINI_API_KEY environment variable must be set.")
+
+            import google.generativeai as genai
+            genai.configure(api_key=GEMINI_API_KEY, transport=GEMINI_TRANSPORT)
+            _genai = genai
+        return _genai
+
 def setup_gemini():
     """Sets up Google Gemini API. Returns a generative model."""
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    
-    # Ensure the GEMINI_API_KEY is set properly
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY environment variable must be set.")
-    
-    genai.configure(api_key=GEMINI_API_KEY)
-    return genai.GenerativeModel(model_name="gemini-1.5-flash")
+    return load_genai().GenerativeModel(model_name="gemini-1.5-flash")
+
+def get_gemini_model():
+    """The process-wide generative model, created on first use."""
+    global _gemini_model
+    if _gemini_model is None:
+        _gemini_model = setup_gemini()
+    return _gemini_model
 
 def get_embedding(text):
     """Generates an embedding for the given text using the Gemini API."""
-    response = genai.embed_content(model="models/embedding-001", content=text)
+    response = load_genai().embed_content(
+        model=EMBEDDING_MODEL, content=text, request_options=GEMINI_REQUEST_OPTIONS
+    )
     return response.get("embedding", [])
 
-def store_content_and_embeddings(file_path, supabase, group_id, sender_id, sender_role):
-    """Extracts content from PDF, generates embeddings, and stores them in Supabase."""
+def get_embeddings(texts):
+    """Generates embeddings for several texts in one Gemini API call, in input order."""
+    if not texts:
+        return []
+    response = load_genai().embed_content(
+        model=EMBEDDING_MODEL, content=list(texts), request_options=GEMINI_REQUEST_OPTIONS
+    )
+    return response.get("embedding", [])
+
+def stamp_rows(rows, after=None):
+    """
+    Gives rows strictly increasing timestamps, 1µs apart and later than
+    after, so chunks keep document order instead of sharing one now() and
+    sorting by their random ids. Returns the last timestamp assigned.
+    """
+    start = datetime.now(timezone.utc)
+    if after is not None and start <= after:
+        start = after + timedelta(microseconds=1)
+    for offset, row in enumerate(rows):
+        row["timestamp"] = (start + timedelta(microseconds=offset)).isoformat()
+    return start + timedelta(microseconds=len(rows) - 1)
+
+def insert_chunk_rows(supabase, group_id, rows):
+    """
+    Bulk-inserts one page of embedded chunk rows and announces them. Rows
+    that already exist (a requeued job inserting its chunks again) are skipped.
+    """
+    response = supabase.table("messages").upsert(rows, ignore_duplicates=True).execute()
+    inserted = {row["id"] for row in response.data}
+    rows = [row for row in rows if row["id"] in inserted]
+    if not rows:
+        return
+    vector_index.append(
+        group_id, [(row["id"], row["content"], row["embedding"], row["timestamp"]) for row in rows]
+    )
+    bump_group_stats(supabase, group_id, messages=len(rows))
+    publish_messages(supabase, group_id, [row["id"] for row in rows])
+
+def chunk_texts(chunks):
+    """Yields the non-empty text of each chunk element."""
+    for chunk in chunks:
+        content = str(chunk).strip()
+        if content:
+            yield content
+
+def partition_document(file_path, progress):
+    """Parses a PDF into chunks. Returns (pages parsed, chunk elements)."""
     try:
+        pages, elements = partition_pages(
+            file_path,
+            PARTITION_SETTINGS,
+            CHUNK_SETTINGS,
+            on_page=lambda finished: progress(pages_parsed=finished),
+        )
+    except Exception as e:
+        # PDFs pypdf cannot split (e.g. encrypted) go through one hi_res pass
+        print(f"Page-parallel partitioning failed, using hi_res on the whole file: {e}")
+        from unstructured.partition.pdf import partition_pdf
+
         elements = partition_pdf(
             filename=file_path,
-            chunking_strategy="by_title",
-            infer_table_strategy=True,
-            max_characters=1000,
-            new_after_n_chars=1500,
-            combine_text_under_n_chars=250,
             strategy="hi_res",
+            chunking_strategy="by_title",
+            include_orig_elements=False,
+            **PARTITION_SETTINGS,
+            **CHUNK_SETTINGS,
         )
-        for el in elements:
-            content = str(el).strip()
-            if content:
-                embedding = get_embedding(content)
-                if embedding:
-                    message_id = str(uuid.uuid4())
-                    supabase.table("messages").insert({
-                        "id": message_id,
-                        "group_id": group_id,
-                        "sender_id": sender_id,
-                        "sender_role": "ai",
-                        "content": content,
-                        "embedding": embedding,
-                    }).execute()
+        pages = len({getattr(el.metadata, "page_number", None) for el in elements} - {None})
+
+    return pages, elements
+
+def ocr_document(file_path, progress):
+    """OCRs an image in the OCR pool and chunks its text like a PDF. Returns (1, chunk elements)."""
+    from unstructured.partition.text import partition_text
+    from unstructured.chunking.title import chunk_by_title
+
+    text = get_ocr_pool().submit(ocr_image, file_path, OCR_SETTINGS).result()
+    progress(pages_parsed=1)
+    elements = chunk_by_title(partition_text(text=text or ""), include_orig_elements=False, **CHUNK_SETTINGS)
+    return 1, elements
+
+PDF_PARSER_SETTINGS = {
+    "parser": "pdf",
+    "partition": PARTITION_SETTINGS,
+    "chunking": CHUNK_SETTINGS,
+    "min_text_layer_chars": MIN_TEXT_LAYER_CHARS,
+}
+IMAGE_PARSER_SETTINGS = {
+    "parser": "ocr",
+    "ocr": OCR_SETTINGS,
+    "chunking": CHUNK_SETTINGS,
+}
+
+# Job kind -> (parser, settings that go into the document fingerprint)
+INGESTION_PARSERS = {
+    "pdf": (partition_document, PDF_PARSER_SETTINGS),
+    "ocr": (ocr_document, IMAGE_PARSER_SETTINGS),
+}
+
+def embed_contents(contents):
+    """
+    Yields (content, embedding) for every chunk the API returned an embedding
+    for, reading contents (any iterable) one EMBEDDING_BATCH_SIZE batch at a time.
+    """
+    contents = iter(contents)
+    while True:
+        batch = list(islice(contents, EMBEDDING_BATCH_SIZE))
+        if not batch:
+            return
+        for content, embedding in zip(batch, get_embeddings(batch)):
+            if embedding:
+                yield content, embedding
+
+def store_content_and_embeddings(file_path, supabase, group_id, sender_id, sender_role, progress=None,
+                                 parser=partition_document, parser_settings=PDF_PARSER_SETTINGS, job_id=None):
+    """
+    Extracts content from PDF (or another document via parser), generates
+    embeddings, and stores them in Supabase.
+    Documents seen before (same bytes and settings) reuse their stored chunks
+    and embeddings instead of being parsed and embedded again.
+    progress, if given, is called with pages_parsed/chunks_total/chunks_embedded
+    counters as work completes. With a job_id, chunk ids are derived from it,
+    so a rerun of the same job does not insert its chunks twice.
+    """
+    progress = progress or (lambda **fields: None)
+    writer = None
+    try:
+        fingerprint = document_fingerprint(
+            file_path, {**parser_settings, "embedding_model": EMBEDDING_MODEL}
+        )
+        # The parser holds the document's chunk text once (by_title chunking
+        # needs every page, but keeps no page elements); from there chunks are
+        # embedded, stored and inserted a batch at a time.
+        cached = chunk_store.load(fingerprint)
+        if cached:
+            pages, total, chunks = cached
+            progress(pages_parsed=pages, chunks_total=total)
+        else:
+            pages, elements = parser(file_path, progress)
+            progress(pages_parsed=pages, chunks_total=len(elements))
+            chunks = embed_contents(chunk_texts(elements))
+            writer = chunk_store.writer(fingerprint)
+
+        embedded = 0
+        pending_rows = []
+        last_timestamp = None
+        occurrences = Counter()
+        for content, embedding in chunks:
+            if writer:
+                writer.add(content, embedding)
+            if job_id:
+                # Named by content, not position: a chunk whose embedding failed
+                # on one run must not shift the ids of the chunks after it
+                occurrences[content] += 1
+                chunk_id = uuid.uuid5(uuid.UUID(job_id), f"{occurrences[content]}:{content}")
+            else:
+                chunk_id = uuid.uuid4()
+            pending_rows.append({
+                "id": str(chunk_id),
+                "group_id": group_id,
+                "sender_id": sender_id,
+                "sender_role": "ai",
+                "content": content,
+                "embedding": embedding,
+            })
+
+            if len(pending_rows) >= INSERT_PAGE_SIZE:
+                last_timestamp = stamp_rows(pending_rows, last_timestamp)
+                insert_chunk_rows(supabase, group_id, pending_rows)
+                embedded += len(pending_rows)
+                pending_rows = []
+                progress(chunks_embedded=embedded)
+
+        if pending_rows:
+            stamp_rows(pending_rows, last_timestamp)
+            insert_chunk_rows(supabase, group_id, pending_rows)
+            embedded += len(pending_rows)
+            progress(chunks_embedded=embedded)
+
+        if writer:
+            writer.commit(pages)
+            writer = None
     except Exception as e:
         print(f"Error in store_content_and_embeddings: {e}")
         raise
+    finally:
+        if writer:
+            writer.discard()
 
-def fetch_relevant_content(supabase, group_id):
-    """Fetches messages for a specific group from Supabase."""
+def fetch_relevant_content(supabase, group_id, query_embedding):
+    """
+    Returns the group's messages most similar to the query embedding as
+    (id, content, score, timestamp) tuples.
+    """
     try:
-        response = supabase.table("messages").select("content").eq("group_id", group_id).execute()
-        return [item["content"] for item in response.data] if response.data else []
+        if not query_embedding:
+            return []
+
+        try:
+            matches = vector_index.search(
+                supabase, group_id, query_embedding, RETRIEVAL_TOP_K, RETRIEVAL_MIN_SCORE
+            )
+            return matches
+        except Exception as e:
+            # Fall back to the database-side search (see sql/match_messages.sql)
+            print(f"Vector index unavailable, using match_messages: {e}")
+
+        response = supabase.rpc("match_messages", {
+            "query_embedding": query_embedding,
+            "p_group_id": group_id,
+            "match_count": RETRIEVAL_TOP_K,
+            "match_threshold": RETRIEVAL_MIN_SCORE,
+        }).execute()
+        return [
+            (item["id"], item["content"], item["similarity"], None)
+            for item in response.data or []
+        ]
     except Exception as e:
         print(f"Error in fetch_relevant_content: {e}")
         raise
@@ -76,15 +321,8 @@ def make_prompt(query, context):
     """Creates a prompt for Gemini using context."""
     return f"Based on the following information, answer the question:\n\n{context}\n\nQuestion: {query}"
 
-def generate_ai_response(user_query, context_text, supabase, group_id, user_id):
-    """Generates an AI answer and saves it to the database."""
-    model = current_app.config["gemini_model"]
-    warnings.filterwarnings("ignore")
-
-    prompt = make_prompt(user_query, context_text)
-    response = model.generate_content(prompt)
-    answer_text = response.text.strip()
-
+def save_ai_response(user_query, answer_text, supabase, group_id, user_id, query_embedding=None):
+    """Stores a finished AI answer as a group message and in the answer cache. Returns the message id."""
     ai_user_id = user_id
     message_id = str(uuid.uuid4())
 
@@ -95,21 +333,93 @@ def generate_ai_response(user_query, context_text, supabase, group_id, user_id):
         "sender_id": ai_user_id,
         "sender_role": "ai",
         "content": answer_text,
+        # No embedding_status: answers stay out of the outbox and out of retrieval context
         "embedding": None,
     }).execute()
+    bump_group_stats(supabase, group_id, messages=1)
+    publish_messages(supabase, group_id, [message_id])
 
-    # Also store in answers table
+    # Also store in answers table, which doubles as the group's answer cache
     supabase.table("answers").insert({
         "query": user_query,
         "answers": answer_text,
-        "student_id":user_id
+        "student_id":user_id,
+        "group_id": group_id,
+        "query_hash": query_hash(user_query),
+        "query_embedding": query_embedding or None,
     }).execute()
 
+    return message_id
+
+def generate_ai_response(user_query, context_text, supabase, group_id, user_id, query_embedding=None):
+    """Generates an AI answer and saves it to the database."""
+    model = get_gemini_model()
+    warnings.filterwarnings("ignore")
+
+    prompt = make_prompt(user_query, context_text)
+    response = model.generate_content(prompt, request_options=GEMINI_REQUEST_OPTIONS)
+    answer_text = response.text.strip()
+
+    save_ai_response(user_query, answer_text, supabase, group_id, user_id, query_embedding)
+
     return answer_text
 
-@gemini_bp.route("/upload", methods=["POST"])
-def upload_file():
-    """Handles file uploads, extracts content, and stores embeddings."""
+def stream_ai_response(user_query, context_text, supabase, group_id, user_id, query_embedding=None):
+    """
+    Returns a generator of Server-Sent Events: a "token" event per piece of
+    text as Gemini produces it, then "done" once the full answer is saved,
+    or "error".
+    """
+    model = get_gemini_model()
+    warnings.filterwarnings("ignore")
+    prompt = make_prompt(user_query, context_text)
+
+    def generate():
+        parts = []
+        try:
+            for chunk in model.generate_content(prompt, stream=True, request_options=GEMINI_REQUEST_OPTIONS):
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield sse_event("token", {"text": chunk.text})
+
+            answer_text = "".join(parts).strip()
+            message_id = save_ai_response(user_query, answer_text, supabase, group_id, user_id, query_embedding)
+            yield sse_event("done", {"answer": answer_text, "message_id": message_id})
+        except Exception as e:
+            traceback.print_exc()
+            yield sse_event("error", {"error": str(e)})
+
+    return generate()
+
+def stream_cached_answer(answer_text):
+    """Replays a cached answer in the same event format as stream_ai_response."""
+    yield sse_event("token", {"text": answer_text})
+    yield sse_event("done", {"answer": answer_text, "cached": True})
+
+def event_stream(events):
+    return Response(events, mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def run_ingestion_job(supabase, job, progress):
+    """
+    Ingests a queued upload (see IngestionJobs). The file is left in place:
+    IngestionJobs removes it once the job is done or failed for good.
+    """
+    parser, parser_settings = INGESTION_PARSERS[job["kind"]]
+    store_content_and_embeddings(
+        job["file_path"], supabase, job["group_id"], job["sender_id"], job["sender_role"],
+        progress, parser, parser_settings, job_id=job["id"],
+    )
+    invalidate_group_answers(supabase, job["group_id"])
+
+ingestion_jobs = IngestionJobs(run_ingestion_job)
+
+def queue_upload(kind, accepts=None):
+    """
+    Saves the request's file to a private temp file and queues its ingestion.
+    accepts, if given, validates the filename. Any API or ingest_worker.py
+    process may claim the job, so UPLOAD_TMP_DIR must be shared between hosts
+    (see IngestionJobs for VECTOR_INDEX_DIR and CHUNK_STORE_DIR).
+    """
     supabase = current_app.config["supabase_client"]
     file_path = None
 
@@ -129,13 +439,33 @@ def upload_file():
             return jsonify({"error": "Empty filename"}), 400
 
         filename = secure_filename(file.filename)
-        file_path = f"./tmp_{filename}"
-        file.save(file_path)
+        if accepts and not accepts(filename):
+            return jsonify({"error": "Unsupported file type"}), 400
 
-        store_content_and_embeddings(file_path, supabase, group_id, sender_id, sender_role)
+        # A private temp file per upload; the job owns it after this request
+        fd, file_path = tempfile.mkstemp(prefix="upload_", suffix=f"_{filename}", dir=UPLOAD_TMP_DIR)
+        with os.fdopen(fd, "wb") as out:
+            size = 0
+            for block in iter(lambda: file.stream.read(UPLOAD_COPY_BLOCK), b""):
+                size += len(block)
+                if size > MAX_UPLOAD_BYTES:
+                    return jsonify({"error": f"File exceeds {MAX_UPLOAD_BYTES} bytes"}), 413
+                out.write(block)
 
-        return jsonify({"message": "✅ Content and embeddings uploaded successfully!"}), 200
+        job_id = ingestion_jobs.submit(supabase, group_id, sender_id, sender_role, filename, kind, file_path)
+        file_path = None  # Owned by the job now
 
+        return jsonify({
+            "message": "Upload received, processing started",
+            "job_id": job_id,
+            "status_url": f"/api/gemini/jobs/{job_id}",
+        }), 202
+
+    except RequestEntityTooLarge:
+        # Raised by request.form once the body passes MAX_CONTENT_LENGTH
+        return jsonify({"error": f"File exceeds {MAX_UPLOAD_BYTES} bytes"}), 413
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
@@ -144,6 +474,39 @@ def upload_file():
         if file_path and os.path.exists(file_path):
             os.remove(file_path)
 
+@gemini_bp.route("/upload", methods=["POST"])
+def upload_file():
+    """
+    Accepts a PDF and queues it for ingestion (parse, embed, store).
+    Returns:
+        202: {"job_id", "status_url"}; poll status_url for progress
+        400: Missing fields or file
+        413: File too large
+        500: Server error
+    """
+    return queue_upload("pdf")
+
+@gemini_bp.route("/upload-image", methods=["POST"])
+def upload_image():
+    """
+    Accepts a photo (whiteboard, handwritten notes) and queues it for OCR
+    and ingestion into the same chunk/embedding pipeline as PDFs.
+    Returns the same responses as /upload.
+    """
+    return queue_upload("ocr", accepts=is_allowed_image)
+
+@gemini_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_ingestion_job(job_id):
+    """Reports an ingestion job's status, pages parsed and chunks embedded."""
+    supabase = current_app.config["supabase_client"]
+    try:
+        job = get_job(supabase, job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @gemini_bp.route("/query", methods=["POST"])
 def ask_question():
     """Handles user queries and returns answers using Gemini or teacher context."""
@@ -154,14 +517,26 @@ def ask_question():
         user_query = data.get("query")
         group_id = data.get("group_id")
         user_id = data.get("user_id")
+        # stream=true answers with Server-Sent Events instead of one JSON body
+        stream = bool(data.get("stream"))
+
+        if not user_query or not group_id:
+            return jsonify({"error": "Missing 'query' or 'group_id'"}), 400
 
-        if not user_query:
-            return jsonify({"error": "Missing 'query'"}), 400
+        # Return an existing answer to the same question in this group
+        cached_answer = find_exact_answer(supabase, group_id, query_hash(user_query))
+        if cached_answer:
+            if stream:
+                return event_stream(stream_cached_answer(cached_answer))
+            return jsonify({"msg": "Answer already exists", "answer": cached_answer}), 200
 
-        # Return existing answer if already present
-        existing = supabase.table("answers").select("*").eq("query", user_query).execute()
-        if existing.data:
-            return jsonify({"msg": "Answer already exists", "answer": existing.data[0]["answers"]}), 200
+        # ...or to a near-identical one
+        query_embedding = get_embedding(user_query)
+        cached_answer = find_similar_answer(supabase, group_id, query_embedding)
+        if cached_answer:
+            if stream:
+                return event_stream(stream_cached_answer(cached_answer))
+            return jsonify({"msg": "Answer already exists", "answer": cached_answer}), 200
 
         # Check if teacher is available
         group_info = supabase.table("groups").select("teacher_id").eq("id", group_id).execute().data
@@ -173,24 +548,20 @@ def ask_question():
             is_teacher_available = teacher_info[0]["is_available"] if teacher_info else True
 
         # Fetch context
-        context_data = fetch_relevant_content(supabase, group_id)
-        context_text = "\n".join(context_data)
+        candidates = fetch_relevant_content(supabase, group_id, query_embedding)
+        context_text = context_packer.pack(candidates)
+
+        if stream:
+            return event_stream(stream_ai_response(
+                user_query, context_text, supabase, group_id, user_id, query_embedding
+            ))
 
         # Generate and return AI answer
-        ai_response = generate_ai_response(user_query, context_text, supabase, group_id, user_id)
+        ai_response = generate_ai_response(
+            user_query, context_text, supabase, group_id, user_id, query_embedding
+        )
         return jsonify({"answer": ai_response})
     
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
-
-# OCR function for extracting text from images
-def extract_text_from_image(file_path):
-    """Extracts text from an image using OCR."""
-    try:
-        img = Image.open(file_path)
-        text = pytesseract.image_to_string(img)  # Use the OCR agent here
-        return text
-    except Exception as e:
-        print(f"Error extracting text: {e}")
-        return None
\ No newline at end of file
@@ -1,17 +1,33 @@
 from flask import Blueprint, request, jsonify, current_app
 import uuid
+import threading
 from urllib.parse import quote
+from cachetools import TTLCache
+from routes.group_stats import STATS_SELECT, bump_group_stats, stats_of
+from routes.loaders import get_loaders
+from routes.session import current_identity, request_user_id, role_id_of
 
 
 group_bp = Blueprint("groups", __name__)
 
+# Each API worker keeps its own copy, stamped with group_stats.details_version.
+# Every read checks the stamp, so a join on any worker is seen everywhere;
+# the TTL only bounds memory.
+GROUP_DETAILS_TTL_SECONDS = 300
+_group_details_cache = TTLCache(maxsize=1024, ttl=GROUP_DETAILS_TTL_SECONDS)
+_group_details_lock = threading.Lock()
+
+TEACHER_GROUPS_SELECT = (
+    f"id, groups(id, subject_name, group_type, semester_id, {STATS_SELECT})"
+)
+
 
 @group_bp.route("/create", methods=["POST"])
 def create_group():
     supabase = current_app.config["supabase_client"]
     try:
         data = request.get_json()
-        user_id = data.get("user_id")  # frontend sends user_id
+        user_id = request_user_id(data.get("user_id"))  # session token, else the user_id field
         semester_id = data.get("semester_id")
         group_type = data.get("group_type")
         subject_name = data.get("subject_name")
@@ -24,14 +40,10 @@ def create_group():
         if group_type not in ("group", "personal"):
             return jsonify({"error": "Invalid group_type, must be 'group' or 'personal'"}), 400
 
-        # 🔍 Fetch teacher_id from teachers table using user_id
-        teacher_response = supabase.table("teachers").select("*").eq("user_id", user_id).execute()
-        print(teacher_response,type(teacher_response))
-
-        # if teacher_response.error:
-        #     return jsonify({"error": "Teacher not found"}), 404
-
-        teacher_id = teacher_response.data[0]["id"]
+        # teacher_id comes from the session token; token-less clients cost a lookup
+        teacher_id = role_id_of(supabase, "teacher", user_id)
+        if not teacher_id:
+            return jsonify({"error": "Teacher not found"}), 404
 
         group_id = str(uuid.uuid4())
         group_data = {
@@ -56,8 +68,9 @@ def create_group():
 def join_group(group_id):
     """
     Allows a student to join a group.
-    Expects JSON:
-        student_id: UUID of the student joining the group.
+    The student is identified by the session token, or for token-less clients by
+    JSON:
+        student_id: user id (UUID) of the student joining the group.
     Returns:
         200 on success
         400 on error or missing student_id
@@ -65,17 +78,21 @@ def join_group(group_id):
     """
     supabase = current_app.config["supabase_client"]
     try:
-        data = request.get_json()
-        student_id = data.get("student_id")
+        data = request.get_json(silent=True) or {}
+        student_id = request_user_id(data.get("student_id"))
 
         if not student_id:
             return jsonify({"error": "Missing student_id in request body"}), 400
 
-    # Getting student id from user id
-        student__id=supabase.table("students").select("id").eq("user_id", student_id).execute().data[0]["id"]
+        # Getting student id from user id
+        student__id = role_id_of(supabase, "student", student_id)
+        if not student__id:
+            return jsonify({"error": "Student not found"}), 404
 
         group_member_data = {"group_id": group_id, "student_id": student__id}
         supabase.table("group_members").insert(group_member_data).execute()
+        bump_group_stats(supabase, group_id, members=1)
+        invalidate_group_details(group_id)
 
         return jsonify({"message": f"Student {student_id} joined group {group_id}"}), 200
 
@@ -86,8 +103,8 @@ def join_group(group_id):
 @group_bp.route("/teacher-groups", methods=["GET"])
 def get_teacher_groups():
     """
-    Get all groups associated with a teacher based on user_id.
-    Query parameter:
+    Get all groups associated with a teacher based on the session token,
+    or for token-less clients on the query parameter:
         user_id: UUID of the user
     Returns:
         200: List of groups
@@ -97,59 +114,36 @@ def get_teacher_groups():
     """
     supabase = current_app.config["supabase_client"]
     try:
-        user_id = request.args.get("user_id")
+        user_id = request_user_id(request.args.get("user_id"))
         
         if not user_id:
             return jsonify({"error": "Missing user_id parameter"}), 400
         
-        # First, get the teacher_id from the teachers table
-        teacher_response = supabase.table("teachers").select("id").eq("user_id", user_id).execute()
+        # One round trip: the teacher row with its groups, semester and
+        # group_stats projection all embedded, keyed by the token's teacher_id
+        identity = current_identity()
+        teacher_query = supabase.table("teachers").select(TEACHER_GROUPS_SELECT)
+        if identity and identity["role"] == "teacher":
+            teacher_query = teacher_query.eq("id", identity["role_id"])
+        else:
+            teacher_query = teacher_query.eq("user_id", user_id)
+        teacher_response = teacher_query.execute()
         
         if not teacher_response.data:
             return jsonify({"error": "Teacher not found for this user"}), 404
         
-        teacher_id = teacher_response.data[0]["id"]
-        
-        # Now, get all groups for this teacher
-        groups_response = supabase.table("groups").select(
-            "id, subject_name, group_type, semester_id"
-        ).eq("teacher_id", teacher_id).execute()
-        
-        # Get semester information for each group
+        loaders = get_loaders()
         result_groups = []
-        for group in groups_response.data:
-            # Get semester information
-            semester_response = supabase.table("semesters").select(
-                "id, semester_number"
-            ).eq("id", group["semester_id"]).execute()
-            
-            semester_number = None
-            if semester_response.data:
-                semester_number = semester_response.data[0]["semester_number"]
-            
-            # Get student count for this group
-            members_count = supabase.table("group_members").select(
-                "id", count="exact"
-            ).eq("group_id", group["id"]).execute()
-            
-            student_count = members_count.count if hasattr(members_count, 'count') else 0
-            
-            # Get latest message timestamp
-            latest_message = supabase.table("messages").select(
-                "timestamp"
-            ).eq("group_id", group["id"]).order("timestamp", desc=True).limit(1).execute()
-            
-            last_activity = None
-            if latest_message.data:
-                last_activity = latest_message.data[0]["timestamp"]
+        for group in teacher_response.data[0]["groups"]:
+            stats = stats_of(group)
             
             group_data = {
                 "id": group["id"],
                 "subject_name": group["subject_name"],
                 "group_type": group["group_type"],
-                "semester_number": semester_number,
-                "student_count": student_count,
-                "last_activity": last_activity
+                "semester_number": loaders.semesters.semester_number(group["semester_id"]),
+                "student_count": stats["member_count"],
+                "last_activity": stats["last_activity"]
             }
             result_groups.append(group_data)
         
@@ -165,8 +159,8 @@ def get_teacher_groups():
 @group_bp.route("/student-groups", methods=["GET"])
 def get_student_groups():
     """
-    Get all groups a student is member of based on user_id.
-    Query parameter:
+    Get all groups a student is member of based on the session token,
+    or for token-less clients on the query parameter:
         user_id: UUID of the user
     Returns:
         200: List of groups
@@ -176,19 +170,17 @@ def get_student_groups():
     """
     supabase = current_app.config["supabase_client"]
     try:
-        user_id = request.args.get("user_id")
+        user_id = request_user_id(request.args.get("user_id"))
         
         if not user_id:
             return jsonify({"error": "Missing user_id parameter"}), 400
         
-        # First, get the student_id from the students table
-        student_response = supabase.table("students").select("id").eq("user_id", user_id).execute()
+        # First, get the student_id (from the session token when there is one)
+        student_id = role_id_of(supabase, "student", user_id)
         
-        if not student_response.data:
+        if not student_id:
             return jsonify({"error": "Student not found for this user"}), 404
         
-        student_id = student_response.data[0]["id"]
-        
         # Get all group memberships for this student
         memberships = supabase.table("group_members").select(
             "group_id"
@@ -197,63 +189,29 @@ def get_student_groups():
         if not memberships.data:
             return jsonify({"groups": []}), 200
         
-        # Get details for each group
+        # Get details for all groups in one query
+        groups_response = supabase.table("groups").select(
+            f"id, subject_name, group_type, teacher_id, semester_id, {STATS_SELECT}"
+        ).in_("id", [membership["group_id"] for membership in memberships.data]).execute()
+        groups = groups_response.data
+        
+        # Teacher names: one teachers query and one users query for all groups
+        loaders = get_loaders()
+        teacher_users = loaders.users_of(loaders.teachers, {group["teacher_id"] for group in groups})
+        
         result_groups = []
-        for membership in memberships.data:
-            group_id = membership["group_id"]
-            
-            # Get group details
-            group_response = supabase.table("groups").select(
-                "id, subject_name, group_type, teacher_id, semester_id"
-            ).eq("id", group_id).execute()
+        for group in groups:
+            teacher_user = teacher_users.get(group["teacher_id"])
             
-            if group_response.data:
-                group = group_response.data[0]
-                
-                # Get teacher information
-                teacher_response = supabase.table("teachers").select(
-                    "user_id"
-                ).eq("id", group["teacher_id"]).execute()
-                
-                teacher_name = "Unknown"
-                if teacher_response.data:
-                    teacher_user_id = teacher_response.data[0]["user_id"]
-                    
-                    # Get teacher name from users table
-                    user_response = supabase.table("users").select(
-                        "name"
-                    ).eq("id", teacher_user_id).execute()
-                    
-                    if user_response.data:
-                        teacher_name = user_response.data[0]["name"]
-                
-                # Get semester information
-                semester_response = supabase.table("semesters").select(
-                    "semester_number"
-                ).eq("id", group["semester_id"]).execute()
-                
-                semester_number = None
-                if semester_response.data:
-                    semester_number = semester_response.data[0]["semester_number"]
-                
-                # Get latest message timestamp
-                latest_message = supabase.table("messages").select(
-                    "timestamp"
-                ).eq("group_id", group["id"]).order("timestamp", desc=True).limit(1).execute()
-                
-                last_activity = None
-                if latest_message.data:
-                    last_activity = latest_message.data[0]["timestamp"]
-                
-                group_data = {
-                    "id": group["id"],
-                    "subject_name": group["subject_name"],
-                    "group_type": group["group_type"],
-                    "teacher_name": teacher_name,
-                    "semester_number": semester_number,
-                    "last_activity": last_activity
-                }
-                result_groups.append(group_data)
+            group_data = {
+                "id": group["id"],
+                "subject_name": group["subject_name"],
+                "group_type": group["group_type"],
+                "teacher_name": teacher_user["name"] if teacher_user else "Unknown",
+                "semester_number": loaders.semesters.semester_number(group["semester_id"]),
+                "last_activity": stats_of(group)["last_activity"]
+            }
+            result_groups.append(group_data)
         
         # Sort by last activity (newest first)
         result_groups.sort(key=lambda x: x["last_activity"] if x["last_activity"] else "", reverse=True)
@@ -268,7 +226,8 @@ def get_student_groups():
 def get_user_info():
     """
     Get user info including role and corresponding teacher/student ID.
-    Query parameter:
+    The user comes from the session token, or for token-less clients from the
+    query parameter:
         user_id: UUID of the user
     Returns:
         200: User info with role and ID
@@ -278,13 +237,15 @@ def get_user_info():
     """
     supabase = current_app.config["supabase_client"]
     try:
-        user_id = request.args.get("user_id")
+        user_id = request_user_id(request.args.get("user_id"))
         
         if not user_id:
             return jsonify({"error": "Missing user_id parameter"}), 400
         
-        # Get user info from users table
-        user_response = supabase.table("users").select("role, name, email").eq("id", user_id).execute()
+        # Get user info from users table, teacher/student row embedded
+        user_response = supabase.table("users").select(
+            "role, name, email, teachers(id, is_available), students(id)"
+        ).eq("id", user_id).execute()
         
         if not user_response.data:
             return jsonify({"error": "User not found"}), 404
@@ -299,20 +260,18 @@ def get_user_info():
             "role": role
         }
         
-        # If teacher, get teacher_id
+        # If teacher, add teacher_id
+        teachers = user_info.get("teachers") or []
+        students = user_info.get("students") or []
         if role == "teacher":
-            teacher_response = supabase.table("teachers").select("id, is_available").eq("user_id", user_id).execute()
-            
-            if teacher_response.data:
-                result["teacher_id"] = teacher_response.data[0]["id"]
-                result["is_available"] = teacher_response.data[0]["is_available"]
+            if teachers:
+                result["teacher_id"] = teachers[0]["id"]
+                result["is_available"] = teachers[0]["is_available"]
         
-        # If student, get student_id
+        # If student, add student_id
         elif role == "student":
-            student_response = supabase.table("students").select("id").eq("user_id", user_id).execute()
-            
-            if student_response.data:
-                result["student_id"] = student_response.data[0]["id"]
+            if students:
+                result["student_id"] = students[0]["id"]
         
         return jsonify(result), 200
         
@@ -320,11 +279,73 @@ def get_user_info():
         return jsonify({"error": str(e)}), 500
 
 
+def load_group_details(supabase, group_id):
+    """Assembles the group-details document from the database, or None if the group is missing."""
+    # Get group details
+    group_response = supabase.table("groups").select(
+        "id, subject_name, group_type, teacher_id, semester_id"
+    ).eq("id", group_id).execute()
+    
+    if not group_response.data:
+        return None
+    
+    group = group_response.data[0]
+    loaders = get_loaders()
+    
+    # Get teacher information
+    teacher_user = loaders.users_of(loaders.teachers, [group["teacher_id"]])[group["teacher_id"]]
+    teacher_name = teacher_user["name"] if teacher_user else "Unknown"
+    teacher_email = teacher_user["email"] if teacher_user else None
+    
+    # Get semester information
+    semester_number = loaders.semesters.semester_number(group["semester_id"])
+    
+    # Get group members with their student and user rows embedded, in one query
+    members_response = supabase.table("group_members").select(
+        "student_id, student:students(user:users(name, email))"
+    ).eq("group_id", group_id).execute()
+    
+    students = []
+    for member in members_response.data:
+        student = member.get("student") or {}
+        user = student.get("user")
+        
+        if user:
+            students.append({
+                "id": member["student_id"],
+                "name": user["name"],
+                "email": user["email"]
+            })
+    
+    return {
+        "id": group["id"],
+        "subject_name": group["subject_name"],
+        "group_type": group["group_type"],
+        "semester_number": semester_number,
+        "teacher": {
+            "id": group["teacher_id"],
+            "name": teacher_name,
+            "email": teacher_email
+        },
+        "students": students
+    }
+
+
+def invalidate_group_details(group_id):
+    """
+    Drops this worker's cached group-details document right away. Other
+    workers notice through group_stats.details_version, bumped by bump_group_stats.
+    """
+    with _group_details_lock:
+        _group_details_cache.pop(group_id, None)
+
+
 @group_bp.route("/group-details/<group_id>", methods=["GET"])
 def get_group_details(group_id):
-    print("grp id", group_id)
     """
     Get detailed information about a specific group.
+    The membership/teacher document is cached per group and details_version;
+    message_count and the version are always read fresh from group_stats.
     Path parameter:
         group_id: UUID of the group
     Returns:
@@ -334,93 +355,33 @@ def get_group_details(group_id):
     """
     supabase = current_app.config["supabase_client"]
     try:
-        # Get group details
-        group_response = supabase.table("groups").select(
-            "id, subject_name, group_type, teacher_id, semester_id"
-        ).eq("id", group_id).execute()
-        
-        if not group_response.data:
-            return jsonify({"error": "Group not found"}), 404
-        
-        group = group_response.data[0]
-        
-        # Get teacher information
-        teacher_response = supabase.table("teachers").select(
-            "user_id"
-        ).eq("id", group["teacher_id"]).execute()
-        
-        teacher_name = "Unknown"
-        teacher_email = None
-        if teacher_response.data:
-            teacher_user_id = teacher_response.data[0]["user_id"]
-            
-            # Get teacher name from users table
-            user_response = supabase.table("users").select(
-                "name, email"
-            ).eq("id", teacher_user_id).execute()
-            
-            if user_response.data:
-                teacher_name = user_response.data[0]["name"]
-                teacher_email = user_response.data[0]["email"]
-        
-        # Get semester information
-        semester_response = supabase.table("semesters").select(
-            "semester_number"
-        ).eq("id", group["semester_id"]).execute()
-        
-        semester_number = None
-        if semester_response.data:
-            semester_number = semester_response.data[0]["semester_number"]
-        
-        # Get group members
-        members_response = supabase.table("group_members").select(
-            "student_id"
-        ).eq("group_id", group_id).execute()
-        
-        students = []
-        for member in members_response.data:
-            student_id = member["student_id"]
-            
-            # Get student user_id
-            student_response = supabase.table("students").select(
-                "user_id"
-            ).eq("id", student_id).execute()
-            
-            if student_response.data:
-                student_user_id = student_response.data[0]["user_id"]
-                
-                # Get student name from users table
-                user_response = supabase.table("users").select(
-                    "name, email"
-                ).eq("id", student_user_id).execute()
-                
-                if user_response.data:
-                    students.append({
-                        "id": student_id,
-                        "name": user_response.data[0]["name"],
-                        "email": user_response.data[0]["email"]
-                    })
-        
-        # Get message count
-        message_count = supabase.table("messages").select(
-            "id", count="exact"
+        stats_response = supabase.table("group_stats").select(
+            "message_count, details_version"
         ).eq("group_id", group_id).execute()
+        stats = stats_response.data[0] if stats_response.data else {}
+        version = stats.get("details_version", 0)
+        
+        with _group_details_lock:
+            cached = _group_details_cache.get(group_id)
+        details = cached[1] if cached and cached[0] == version else None
+        
+        if details is None:
+            details = load_group_details(supabase, group_id)
+            if details is None:
+                return jsonify({"error": "Group not found"}), 404
+            # Stored under the version read before loading: if a join lands
+            # meanwhile, the bumped version makes the next read reload
+            with _group_details_lock:
+                current = _group_details_cache.get(group_id)
+                if current is None or current[0] <= version:
+                    _group_details_cache[group_id] = (version, details)
         
         result = {
-            "id": group["id"],
-            "subject_name": group["subject_name"],
-            "group_type": group["group_type"],
-            "semester_number": semester_number,
-            "teacher": {
-                "id": group["teacher_id"],
-                "name": teacher_name,
-                "email": teacher_email
-            },
-            "students": students,
-            "message_count": message_count.count if hasattr(message_count, 'count') else 0
+            **details,
+            "message_count": stats.get("message_count", 0)
         }
         
         return jsonify(result), 200
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,24 @@
+STATS_SELECT = "stats:group_stats(member_count, message_count, last_activity)"
+
+EMPTY_STATS = {"member_count": 0, "message_count": 0, "last_activity": None}
+
+
+def bump_group_stats(supabase, group_id, members=0, messages=0):
+    """Increments the group_stats projection (see sql/group_stats.sql)."""
+    try:
+        supabase.rpc("bump_group_stats", {
+            "p_group_id": group_id,
+            "p_members": members,
+            "p_messages": messages,
+        }).execute()
+    except Exception as e:
+        # The source rows are already written; refresh_group_stats() repairs drift
+        print(f"Error in bump_group_stats: {e}")
+
+
+def stats_of(row):
+    """Returns the embedded group_stats record of a group row, or zeroed stats."""
+    stats = row.get("stats")
+    if isinstance(stats, list):
+        stats = stats[0] if stats else None
+    return stats or EMPTY_STATS
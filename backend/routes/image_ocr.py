@@ -0,0 +1,74 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+OCR_SETTINGS = {
+    # Longest side in pixels; phone photos are downscaled to this before OCR
+    "max_side": int(os.getenv("OCR_MAX_SIDE", "2500")),
+    "lang": os.getenv("OCR_LANG", "eng"),
+    "binarize": "otsu",
+}
+ALLOWED_IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "webp", "bmp", "tif", "tiff"}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ocr_pool():
+    """Bounded process pool for OCR, so photo uploads cannot starve the web workers."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def otsu_threshold(histogram):
+    """Grey level that best separates ink from background in a 256-bin histogram."""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background, weighted_background = 0, 0
+    best_level, best_variance = 0, 0.0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def ocr_image(file_path, settings):
+    """
+    Runs in a pool process: downscales, binarizes and OCRs one image.
+    pytesseract only wraps the tesseract binary, which must be installed on
+    the host (e.g. apt install tesseract-ocr, plus tesseract-ocr-<lang> for OCR_LANG).
+    """
+    import pytesseract
+    from PIL import Image, ImageOps
+
+    with Image.open(file_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((settings["max_side"], settings["max_side"]))
+        gray = ImageOps.autocontrast(image.convert("L"))
+
+    threshold = otsu_threshold(gray.histogram())
+    binary = gray.point(lambda level: 255 if level > threshold else 0, mode="1")
+    return pytesseract.image_to_string(binary, lang=settings["lang"])
+
+
+def is_allowed_image(filename):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
@@ -0,0 +1,280 @@
+import os
+import uuid
+import time
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+# "inline": API processes run ingestion jobs themselves (single-box development).
+# "worker": API processes only queue jobs; ingest_worker.py claims and runs them.
+INGESTION_MODE = os.getenv("INGESTION_MODE", "inline")
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+# A running job's claim lasts this long unless renewed (every third of it);
+# jobs whose process died are requeued once it lapses
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+# Claims a job gets before it is failed instead of requeued again
+MAX_JOB_ATTEMPTS = int(os.getenv("MAX_JOB_ATTEMPTS", "3"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+# What GET /api/gemini/jobs/<job_id> reports; file_path and claimed_by stay internal
+JOB_SELECT = "id, group_id, filename, kind, status, pages_parsed, chunks_total, chunks_embedded, error, created_at, updated_at"
+
+
+class JobProgress:
+    """
+    Callable handed to a job's runner; each call records progress fields on
+    the job row and returns whether this process still held the claim.
+    """
+
+    def __init__(self, supabase, job_id):
+        self.supabase = supabase
+        self.job_id = job_id
+
+    def __call__(self, **fields):
+        fields["updated_at"] = datetime.now(timezone.utc).isoformat()
+        try:
+            # Only while this process holds the claim; a requeued job belongs to its new runner
+            response = (
+                self.supabase.table("ingestion_jobs")
+                .update(fields)
+                .eq("id", self.job_id)
+                .eq("claimed_by", WORKER_ID)
+                .execute()
+            )
+            return bool(response.data)
+        except Exception as e:
+            # Progress reporting must never fail the ingestion itself
+            print(f"Error updating ingestion job {self.job_id}: {e}")
+            return False
+
+
+class IngestionJobs:
+    """
+    Runs ingestion jobs on a bounded worker pool, tracked in the ingestion_jobs table.
+
+    A job row carries everything needed to run it (kind, file path, group,
+    sender), so any process can pick it up: any API process (inline mode) or
+    a dedicated ingestion worker polling the table. Jobs are claimed with a
+    conditional update and hold a lease (claimed_at) that is renewed while
+    they run; jobs of a process that died are requeued when it lapses, up to
+    MAX_JOB_ATTEMPTS claims. Reruns are safe: chunk ids derive from the job.
+
+    file_path must be readable by whichever process claims the job, so
+    UPLOAD_TMP_DIR has to be shared between hosts, and so should
+    VECTOR_INDEX_DIR and CHUNK_STORE_DIR for the worker's output to be
+    reused rather than rebuilt by every host.
+    """
+
+    def __init__(self, runner, max_workers=INGESTION_WORKERS, inline=INGESTION_MODE == "inline"):
+        self.runner = runner  # runner(supabase, job, progress)
+        self.max_workers = max_workers
+        self.inline = inline
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._stopped = threading.Event()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingestion")
+            return self._executor
+
+    def submit(self, supabase, group_id, sender_id, sender_role, filename, kind, file_path):
+        """
+        Records a queued job, and schedules it right away in inline mode.
+        Returns the job id.
+        """
+        job_id = str(uuid.uuid4())
+        supabase.table("ingestion_jobs").insert({
+            "id": job_id,
+            "group_id": group_id,
+            "sender_id": sender_id,
+            "sender_role": sender_role,
+            "filename": filename,
+            "kind": kind,
+            "file_path": file_path,
+            "status": "queued",
+        }).execute()
+
+        if self.inline:
+            self._schedule(supabase, job_id)
+        return job_id
+
+    def _schedule(self, supabase, job_id):
+        with self._lock:
+            if job_id in self._in_flight:
+                return
+            self._in_flight.add(job_id)
+        self._pool().submit(self._run, supabase, job_id)
+
+    def claim(self, supabase, job_id):
+        """Marks a queued job as running by this process. Returns the job row, or None if taken."""
+        now = datetime.now(timezone.utc).isoformat()
+        response = (
+            supabase.table("ingestion_jobs")
+            .update({
+                "status": "running",
+                "claimed_by": WORKER_ID,
+                "claimed_at": now,
+                "updated_at": now,
+            })
+            .eq("id", job_id)
+            .eq("status", "queued")
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    def _renew_leases(self, supabase):
+        """Pushes claimed_at forward on every job this process is running."""
+        with self._lock:
+            job_ids = list(self._in_flight)
+        if not job_ids:
+            return
+        (
+            supabase.table("ingestion_jobs")
+            .update({"claimed_at": datetime.now(timezone.utc).isoformat()})
+            .in_("id", job_ids)
+            .eq("status", "running")
+            .eq("claimed_by", WORKER_ID)
+            .execute()
+        )
+
+    def requeue_expired(self, supabase):
+        """
+        Returns running jobs whose lease lapsed (their process died or hung)
+        to the queue, or fails them after MAX_JOB_ATTEMPTS claims. Each row is
+        updated only if its lease is unchanged, so a late renewal wins.
+        """
+        expired_before = datetime.now(timezone.utc) - timedelta(seconds=JOB_LEASE_SECONDS)
+        response = (
+            supabase.table("ingestion_jobs")
+            .select("id, file_path, attempts, claimed_at")
+            .eq("status", "running")
+            .lt("claimed_at", expired_before.isoformat())
+            .execute()
+        )
+        for job in response.data:
+            attempts = (job.get("attempts") or 0) + 1
+            fields = {"claimed_by": None, "attempts": attempts, "updated_at": datetime.now(timezone.utc).isoformat()}
+            if attempts >= MAX_JOB_ATTEMPTS:
+                fields.update(status="failed", error="Ingestion was interrupted too many times")
+            else:
+                fields["status"] = "queued"
+            updated = (
+                supabase.table("ingestion_jobs")
+                .update(fields)
+                .eq("id", job["id"])
+                .eq("status", "running")
+                .eq("claimed_at", job["claimed_at"])
+                .execute()
+            )
+            if updated.data and fields["status"] == "failed":
+                file_path = job.get("file_path")
+                if file_path and os.path.exists(file_path):
+                    os.remove(file_path)
+
+    def _run(self, supabase, job_id):
+        try:
+            job = self.claim(supabase, job_id)
+            if not job:
+                return
+            progress = JobProgress(supabase, job_id)
+            try:
+                self.runner(supabase, job, progress)
+                finished = progress(status="done")
+            except Exception as e:
+                traceback.print_exc()
+                finished = progress(status="failed", error=str(e))
+            # The upload is only ours to delete once this process recorded the
+            # outcome; a released or requeued job still needs it
+            file_path = job.get("file_path")
+            if finished and file_path and os.path.exists(file_path):
+                os.remove(file_path)
+        except Exception as e:
+            print(f"Error running ingestion job {job_id}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(job_id)
+
+    def serve(self, supabase, stopped, poll_interval=JOB_POLL_SECONDS):
+        """
+        Claims and runs queued jobs until the stopped event is set, renewing
+        the leases of running jobs and requeueing expired ones as it goes.
+        """
+        last_renewal = 0.0
+        while not stopped.is_set():
+            try:
+                now = time.monotonic()
+                if now - last_renewal >= JOB_LEASE_SECONDS / 3:
+                    self._renew_leases(supabase)
+                    self.requeue_expired(supabase)
+                    last_renewal = now
+            except Exception as e:
+                print(f"Error renewing ingestion job leases: {e}")
+            try:
+                with self._lock:
+                    free = self.max_workers - len(self._in_flight)
+                if free > 0:
+                    response = (
+                        supabase.table("ingestion_jobs")
+                        .select("id")
+                        .eq("status", "queued")
+                        .order("created_at", desc=False)
+                        .limit(free)
+                        .execute()
+                    )
+                    for row in response.data:
+                        self._schedule(supabase, row["id"])
+            except Exception as e:
+                print(f"Error polling ingestion jobs: {e}")
+            stopped.wait(poll_interval)
+
+    def start(self, supabase):
+        """Polls for queued jobs on a background thread (inline mode), e.g. ones left by a restart."""
+        threading.Thread(
+            target=self.serve, args=(supabase, self._stopped), name="ingestion-poller", daemon=True
+        ).start()
+
+    def running(self):
+        """Whether any job is still running in this process."""
+        with self._lock:
+            return bool(self._in_flight)
+
+    def release(self, supabase):
+        """Requeues the jobs this process is running, so another process can take them over now."""
+        with self._lock:
+            job_ids = list(self._in_flight)
+        if not job_ids:
+            return
+        try:
+            (
+                supabase.table("ingestion_jobs")
+                .update({"status": "queued", "claimed_by": None, "updated_at": datetime.now(timezone.utc).isoformat()})
+                .in_("id", job_ids)
+                .eq("status", "running")
+                .eq("claimed_by", WORKER_ID)
+                .execute()
+            )
+        except Exception as e:
+            print(f"Error releasing ingestion jobs: {e}")
+
+    def shutdown(self, wait=True):
+        """
+        Stops polling and the pool. With wait=False running jobs are not
+        waited for; release() them, and their leases cover a process that
+        exits before it can.
+        """
+        self._stopped.set()
+        with self._lock:
+            executor = self._executor
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def get_job(supabase, job_id):
+    response = supabase.table("ingestion_jobs").select(JOB_SELECT).eq("id", job_id).execute()
+    return response.data[0] if response.data else None
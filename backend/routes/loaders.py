@@ -0,0 +1,107 @@
+from flask import current_app, g
+from routes.semester import semester_cache
+
+
+# Columns each loader fetches: the union of what the hydration code reads
+USER_COLUMNS = "id, name, email"
+TEACHER_COLUMNS = "id, user_id, is_available"
+STUDENT_COLUMNS = "id, user_id"
+
+
+class EntityLoader:
+    """
+    Batches lookups of one table by id within a request.
+
+    prime() queues ids; the next get()/get_many() fetches every queued id in
+    a single in_() query. Rows are memoized for the rest of the request, and
+    missing ids resolve to None.
+    """
+
+    def __init__(self, supabase, table, columns, key="id"):
+        self.supabase = supabase
+        self.table = table
+        self.columns = columns
+        self.key = key
+        self._rows = {}
+        self._pending = set()
+
+    def prime(self, ids):
+        for entity_id in ids:
+            if entity_id is not None and entity_id not in self._rows:
+                self._pending.add(entity_id)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending = list(self._pending)
+        self._pending.clear()
+        response = (
+            self.supabase.table(self.table)
+            .select(self.columns)
+            .in_(self.key, pending)
+            .execute()
+        )
+        for entity_id in pending:
+            self._rows[entity_id] = None
+        for row in response.data:
+            self._rows[row[self.key]] = row
+
+    def get(self, entity_id):
+        return self.get_many([entity_id])[0]
+
+    def get_many(self, ids):
+        """Rows for ids, in order (None for unknown ids)."""
+        ids = list(ids)
+        self.prime(ids)
+        self._flush()
+        return [self._rows.get(entity_id) for entity_id in ids]
+
+
+class SemesterLoader:
+    """Same interface as EntityLoader, served from the process-wide semester cache."""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def prime(self, ids):
+        pass
+
+    def get(self, semester_id):
+        return semester_cache.get(self.supabase, semester_id)
+
+    def get_many(self, ids):
+        return [self.get(semester_id) for semester_id in ids]
+
+    def semester_number(self, semester_id):
+        row = self.get(semester_id)
+        return row["semester_number"] if row else None
+
+
+class Loaders:
+    """The loaders of one request; see get_loaders()."""
+
+    def __init__(self, supabase):
+        self.users = EntityLoader(supabase, "users", USER_COLUMNS)
+        self.teachers = EntityLoader(supabase, "teachers", TEACHER_COLUMNS)
+        self.students = EntityLoader(supabase, "students", STUDENT_COLUMNS)
+        self.semesters = SemesterLoader(supabase)
+
+    def users_of(self, role_loader, ids):
+        """
+        Maps teacher or student ids to their users rows (None when missing)
+        with at most one query on the role table and one on users.
+        """
+        ids = list(ids)
+        role_rows = role_loader.get_many(ids)
+        self.users.prime(row["user_id"] for row in role_rows if row)
+        return {
+            entity_id: self.users.get(row["user_id"]) if row else None
+            for entity_id, row in zip(ids, role_rows)
+        }
+
+
+def get_loaders():
+    """Loaders scoped to the current request, created on first use."""
+    if "loaders" not in g:
+        g.loaders = Loaders(current_app.config["supabase_client"])
+    return g.loaders
@@ -1,6 +1,10 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 import uuid
-from routes.gemini import get_embedding
+import base64
+import queue
+from datetime import datetime
+from routes.realtime import broker, publish_messages, format_event, sse_event, HEARTBEAT_SECONDS
+from routes.group_stats import bump_group_stats
 
 
 message_bp = Blueprint("messages", __name__)
@@ -16,7 +20,6 @@ def send_message():
         sender_id = data.get("sender_id")
         sender_role = data.get("sender_role")
         content = data.get("content")
-        embedding = get_embedding(content)
 
         if not all([group_id, sender_id, sender_role, content]):
             return (
@@ -39,51 +42,237 @@ def send_message():
             "sender_role": sender_role,
             "content": content,
             "timestamp": "now()",
-            "embedding": embedding
+            # Filled in by the background EmbeddingWorker
+            "embedding": None,
+            "embedding_status": "pending",
         }
 
         supabase.table("messages").insert(message_data).execute()
+        bump_group_stats(supabase, group_id, messages=1)
+        embedding_worker = current_app.config.get("embedding_worker")
+        if embedding_worker:  # None when ingest_worker.py embeds messages
+            embedding_worker.notify()
+        publish_messages(supabase, group_id, [message_id])
 
         return jsonify({"message": "Message sent", "message_id": message_id}), 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+DEFAULT_AVATAR = "https://thispersondoesnotexist.com/"
+
+# Sender identity is embedded through the messages.sender_id -> users.id
+# foreign key so the whole transcript comes back in one round trip. Only
+# display columns: fetches and every pushed event skip the embedding vector
+# and the outbox bookkeeping.
+MESSAGE_SELECT = "id, group_id, sender_id, sender_role, content, timestamp, sender:users!sender_id(name, email)"
+
+
+def hydrate_messages(messages):
+    """Flattens the embedded sender relation into sender_name/sender_email/sender_avatar."""
+    for message in messages:
+        sender = message.pop("sender", None)
+
+        if sender:
+            message["sender_name"] = sender["name"]
+            message["sender_email"] = sender["email"]
+        else:
+            message["sender_name"] = "Unknown User"  # Handle case where user is not found
+
+        # Add avatar URL here (you might need to fetch it from another table if it's not in the users table)
+        message["sender_avatar"] = DEFAULT_AVATAR
+
+    return messages
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Reconnect backfill replays at most this many pages before asking the client to re-fetch
+BACKFILL_MAX_PAGES = 10
+
+
+def encode_cursor(message):
+    """Builds an opaque keyset cursor from a message's (timestamp, id)."""
+    raw = f"{message['timestamp']}|{message['id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (timestamp, id) pair stored in a cursor, or raises ValueError.
+    Cursors come from clients and end up in a PostgREST filter, so both parts
+    are parsed and re-serialized rather than passed through.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, message_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp).isoformat(), str(uuid.UUID(message_id))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_filter(cursor, op):
+    """PostgREST or() filter selecting rows strictly before (lt) or after (gt) a cursor."""
+    timestamp, message_id = decode_cursor(cursor)
+    return f'timestamp.{op}."{timestamp}",and(timestamp.eq."{timestamp}",id.{op}.{message_id})'
+
+
 @message_bp.route("/fetch/<group_id>", methods=["GET"])
 def fetch_messages(group_id):
+    """
+    Fetch a page of messages for a group, oldest first.
+    Query parameters:
+        limit: page size (default 50, max 200)
+        before: cursor, return the page of messages older than it
+        after: cursor, return messages newer than it
+        since: cursor, incremental mode; same as after, for polling new rows
+    With no cursor the latest page is returned.
+    Returns:
+        200: {"messages": [...], "has_more": bool, "before": cursor, "after": cursor}
+        400: Invalid cursor or limit
+        500: Server error
+    """
     supabase = current_app.config["supabase_client"]
     try:
-        response = (
+        try:
+            limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        before = request.args.get("before")
+        after = request.args.get("after") or request.args.get("since")
+
+        if before and after:
+            return jsonify({"error": "Use either before or after/since, not both"}), 400
+
+        # Newer-than reads walk forward; everything else walks back from the newest row
+        forward = bool(after)
+        query = (
             supabase.table("messages")
-            .select("*")
+            .select(MESSAGE_SELECT)
             .eq("group_id", group_id)
-            .order("timestamp", desc=False)
+        )
+
+        try:
+            if after:
+                query = query.or_(keyset_filter(after, "gt"))
+            elif before:
+                query = query.or_(keyset_filter(before, "lt"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Fetch one extra row to know whether another page exists
+        response = (
+            query.order("timestamp", desc=not forward)
+            .order("id", desc=not forward)
+            .limit(limit + 1)
             .execute()
         )
 
-        messages = response.data
+        rows = response.data
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not forward:
+            rows.reverse()
+
+        messages = hydrate_messages(rows)
+
+        return jsonify({
+            "messages": messages,
+            "has_more": has_more,
+            "before": encode_cursor(messages[0]) if messages else before,
+            "after": encode_cursor(messages[-1]) if messages else after,
+        }), 200
 
-        # Add sender information to each message
-        for message in messages:
-            sender_id = message["sender_id"]
-            sender_role = message["sender_role"]
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-            # Fetch user information from the users table
-            user_response = supabase.table("users").select("name, email").eq("id", sender_id).execute()
 
-            if user_response.data:
-                user_data = user_response.data[0]
-                message["sender_name"] = user_data["name"]
-                message["sender_email"] = user_data["email"]  # Optional
-                # Add avatar URL here (you might need to fetch it from another table if it's not in the users table)
-                message["sender_avatar"] = "https://thispersondoesnotexist.com/"  # Replace with actual avatar URL
+def backlog_page(supabase, group_id, cursor):
+    """One page of messages newer than cursor, oldest first. Returns (messages, has_more)."""
+    response = (
+        supabase.table("messages")
+        .select(MESSAGE_SELECT)
+        .eq("group_id", group_id)
+        .or_(keyset_filter(cursor, "gt"))
+        .order("timestamp", desc=False)
+        .order("id", desc=False)
+        .limit(MAX_PAGE_SIZE + 1)
+        .execute()
+    )
+    rows = response.data
+    return hydrate_messages(rows[:MAX_PAGE_SIZE]), len(rows) > MAX_PAGE_SIZE
 
 
-            else:
-                message["sender_name"] = "Unknown User"  # Handle case where user is not found
-                message["sender_avatar"] = "https://thispersondoesnotexist.com/"
+@message_bp.route("/stream/<group_id>", methods=["GET"])
+def stream_messages(group_id):
+    """
+    Server-Sent Events stream of new messages in a group.
+    Query parameter:
+        since: optional cursor; messages newer than it are replayed first.
+        The Last-Event-ID header sent by EventSource on reconnect works the same way.
+    Each event's id is the message cursor, data is the hydrated message JSON.
+    The backfill is replayed page by page. If more than BACKFILL_MAX_PAGES
+    pages were missed (or a page fails), a "resync" event is sent and the
+    stream ends; the client should re-fetch the transcript and reconnect.
+    """
+    supabase = current_app.config["supabase_client"]
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
 
-        return jsonify(messages), 200
+    if since:
+        try:
+            decode_cursor(since)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
+    # Subscribe before backfilling so nothing inserted in between is lost
+    subscription = broker.subscribe(group_id)
+
+    try:
+        backlog, backlog_has_more = backlog_page(supabase, group_id, since) if since else ([], False)
     except Exception as e:
+        broker.unsubscribe(subscription)
         return jsonify({"error": str(e)}), 500
+
+    def generate():
+        replayed = set()
+        try:
+            page, has_more, pages = backlog, backlog_has_more, 1
+            while True:
+                for message in page:
+                    replayed.add(message["id"])
+                    yield format_event(message, encode_cursor(message))
+                if not has_more:
+                    break
+                if pages >= BACKFILL_MAX_PAGES:
+                    yield sse_event("resync", {"reason": "backlog too large"})
+                    return
+                try:
+                    page, has_more = backlog_page(supabase, group_id, encode_cursor(page[-1]))
+                    pages += 1
+                except Exception as e:
+                    print(f"Error in stream backfill: {e}")
+                    yield sse_event("resync", {"reason": "backfill failed"})
+                    return
+
+            while not subscription.closed:
+                try:
+                    message = subscription.queue.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if message is None:  # broker.close()
+                    break
+                if message["id"] in replayed:
+                    continue
+                yield format_event(message, encode_cursor(message))
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
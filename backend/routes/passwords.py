@@ -0,0 +1,136 @@
+import os
+import threading
+import multiprocessing
+from itertools import repeat
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import bcrypt
+
+
+# bcrypt cost; raising it rehashes each user's password on their next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Hashes computed at once (bcrypt releases the GIL), and hashes allowed to wait.
+# Both are per process: by default the web workers (WEB_CONCURRENCY) share
+# half the cores between them, leaving the rest for request handling.
+_WEB_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // 2 // _WEB_WORKERS))))
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", str(4 * HASH_WORKERS)))
+HASH_RETRY_AFTER_SECONDS = int(os.getenv("HASH_RETRY_AFTER_SECONDS", "2"))
+# Processes used by bulk imports, separate from the login/signup pool; also
+# per web worker, so sized like HASH_WORKERS
+BULK_HASH_WORKERS = int(os.getenv(
+    "BULK_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // 2 // _WEB_WORKERS))
+))
+
+_bulk_pool = None
+_bulk_pool_lock = threading.Lock()
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when the hashing pool is full."""
+
+    def __init__(self, retry_after):
+        super().__init__("Too many password operations in progress, retry shortly")
+        self.retry_after = retry_after
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def hash_cost(hashed):
+    """The cost factor of a "$2b$12$..." bcrypt hash, or None if it cannot be read."""
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited pool so hashing never occupies
+    more than HASH_WORKERS cores per process. At most HASH_QUEUE_DEPTH more
+    operations may wait; beyond that callers get HasherBusy right away, which
+    routes turn into 503 with Retry-After instead of piling up request threads.
+    """
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=HASH_WORKERS, queue_depth=HASH_QUEUE_DEPTH,
+                 retry_after=HASH_RETRY_AFTER_SECONDS):
+        self.rounds = rounds
+        self.workers = workers
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy(self.retry_after)
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def hash(self, password):
+        return self._submit(_hashpw, password, self.rounds).result()
+
+    def verify(self, password, hashed):
+        return self._submit(_checkpw, password, hashed).result()
+
+    def needs_rehash(self, hashed):
+        return hash_cost(hashed) != self.rounds
+
+    def rehash_later(self, password, on_hashed):
+        """
+        Hashes password at the current cost in the background and calls
+        on_hashed(new_hash). Skipped when the pool is busy; the next login retries.
+        """
+        try:
+            future = self._submit(_hashpw, password, self.rounds)
+        except HasherBusy:
+            return
+
+        def done(future):
+            try:
+                on_hashed(future.result())
+            except Exception as e:
+                print(f"Error rehashing password: {e}")
+
+        future.add_done_callback(done)
+
+
+password_hasher = PasswordHasher()
+
+
+def get_bulk_hash_pool():
+    """Process pool for hashing whole rosters without touching the request-path pool."""
+    global _bulk_pool
+    with _bulk_pool_lock:
+        if _bulk_pool is None:
+            # spawn: forking a threaded web worker is unsafe
+            _bulk_pool = ProcessPoolExecutor(
+                max_workers=BULK_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _bulk_pool
+
+
+def hash_many(passwords, rounds=BCRYPT_ROUNDS):
+    """Hashes passwords in parallel across processes, in input order."""
+    passwords = list(passwords)
+    if not passwords:
+        return []
+    chunksize = max(1, len(passwords) // (4 * BULK_HASH_WORKERS))
+    return list(get_bulk_hash_pool().map(_hashpw, passwords, repeat(rounds), chunksize=chunksize))
@@ -0,0 +1,117 @@
+import io
+import os
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Partitioning processes per process. In inline mode every web worker
+# (WEB_CONCURRENCY) may ingest, so by default they split the cores between
+# them; in worker mode only ingest_worker.py partitions and gets them all.
+_INGESTING_PROCESSES = (
+    int(os.getenv("WEB_CONCURRENCY", "1")) if os.getenv("INGESTION_MODE", "inline") == "inline" else 1
+)
+PARTITION_WORKERS = int(os.getenv(
+    "PARTITION_WORKERS", str(max(1, (os.cpu_count() or 1) // _INGESTING_PROCESSES))
+))
+# Pages whose text layer has fewer characters than this are treated as scanned
+MIN_TEXT_LAYER_CHARS = int(os.getenv("MIN_TEXT_LAYER_CHARS", "50"))
+# Pages in flight per document; bounds the page bytes and elements held at once
+PARTITION_WINDOW = int(os.getenv("PARTITION_WINDOW", str(2 * PARTITION_WORKERS)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_partition_pool():
+    """Process pool shared by all uploads, so the hi_res model loads once per process."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded web worker is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=PARTITION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def split_pages(file_path):
+    """Yields (page_number, strategy, single-page PDF bytes) for every page."""
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(file_path)
+    for page_number, page in enumerate(reader.pages, start=1):
+        text = page.extract_text() or ""
+        strategy = "fast" if len(text.strip()) >= MIN_TEXT_LAYER_CHARS else "hi_res"
+
+        writer = PdfWriter()
+        writer.add_page(page)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        yield page_number, strategy, buffer.getvalue()
+
+
+def partition_page(page_bytes, page_number, strategy, settings):
+    """Runs in a pool process: partitions one page without chunking."""
+    from unstructured.partition.pdf import partition_pdf
+
+    return partition_pdf(
+        file=io.BytesIO(page_bytes),
+        strategy=strategy,
+        starting_page_number=page_number,
+        **settings,
+    )
+
+
+def iter_page_elements(file_path, settings, on_page=None):
+    """
+    Yields the elements of every page, in page order, while at most
+    PARTITION_WINDOW pages are being partitioned in the pool.
+    on_page, if given, is called with the number of pages finished so far.
+    """
+    pool = get_partition_pool()
+    in_flight = deque()
+    finished = 0
+
+    for page_number, strategy, page_bytes in split_pages(file_path):
+        in_flight.append(pool.submit(partition_page, page_bytes, page_number, strategy, settings))
+        if len(in_flight) >= PARTITION_WINDOW:
+            yield from in_flight.popleft().result()
+            finished += 1
+            if on_page:
+                on_page(finished)
+
+    while in_flight:
+        yield from in_flight.popleft().result()
+        finished += 1
+        if on_page:
+            on_page(finished)
+
+
+def partition_pages(file_path, settings, chunk_settings, on_page=None):
+    """
+    Partitions a PDF page by page in the process pool, using the fast text
+    extraction path for born-digital pages and hi_res only for scanned ones.
+    Page elements stream in page order into a single chunk_by_title pass
+    over the whole document, exactly as one partition_pdf call would chunk.
+    Page elements are dropped as they are chunked (include_orig_elements=False),
+    so only the chunks' text is held. Returns (page count, chunks).
+    """
+    from unstructured.chunking.title import chunk_by_title
+
+    pages = 0
+
+    def count_pages(finished):
+        nonlocal pages
+        pages = finished
+        if on_page:
+            on_page(finished)
+
+    chunks = chunk_by_title(
+        iter_page_elements(file_path, settings, count_pages),
+        include_orig_elements=False,
+        **chunk_settings,
+    )
+    return pages, chunks
@@ -0,0 +1,235 @@
+import os
+import json
+import queue
+import select
+import threading
+from collections import defaultdict
+
+
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 256
+# Direct (or session-pooled) Postgres connection string. When set, new
+# messages reach the subscribers of every process via LISTEN/NOTIFY;
+# without it, only those connected to the process that inserted them.
+DATABASE_URL = os.getenv("DATABASE_URL")
+NOTIFY_CHANNEL = "group_messages"
+# NOTIFY payloads are limited to 8000 bytes; 100 uuids stay well below
+NOTIFY_IDS_PER_PAYLOAD = 100
+RELAY_RECONNECT_SECONDS = 5
+
+
+class Subscription:
+    """A single connected client listening to one group."""
+
+    def __init__(self, group_id, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.group_id = group_id
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.closed = False
+
+
+class MessageBroker:
+    """In-process fan-out of new group messages to every subscribed client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, group_id):
+        subscription = Subscription(group_id)
+        with self._lock:
+            self._subscribers[group_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.closed = True
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.group_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.group_id]
+
+    def has_subscribers(self, group_id):
+        with self._lock:
+            return bool(self._subscribers.get(group_id))
+
+    def publish(self, group_id, messages):
+        """Queues messages for every subscriber of the group. Slow clients are dropped."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(group_id, ()))
+
+        for subscription in subscribers:
+            try:
+                for message in messages:
+                    subscription.queue.put_nowait(message)
+            except queue.Full:
+                # The client fell behind; it reconnects and backfills with its cursor
+                self.unsubscribe(subscription)
+
+    def close(self):
+        """Ends every open stream, e.g. when the worker shuts down; clients reconnect elsewhere."""
+        with self._lock:
+            subscriptions = [s for subscribers in self._subscribers.values() for s in subscribers]
+            self._subscribers.clear()
+
+        for subscription in subscriptions:
+            subscription.closed = True
+            try:
+                subscription.queue.put_nowait(None)
+            except queue.Full:
+                pass  # Its stream drains the queue and then sees closed
+
+
+broker = MessageBroker()
+
+
+class NotifyRelay:
+    """
+    Cross-process fan-out over Postgres LISTEN/NOTIFY.
+
+    notify() announces {"group_id", "ids"} on NOTIFY_CHANNEL; every process
+    runs a listener thread that loads the announced messages for groups it
+    has subscribers for and hands them to its broker. After a lost listener
+    connection the local streams are closed, so clients reconnect and
+    backfill whatever was announced in the meantime.
+    """
+
+    def __init__(self, dsn, supabase, channel=NOTIFY_CHANNEL):
+        self.dsn = dsn
+        self.supabase = supabase
+        self.channel = channel
+        self._sender = None
+        self._send_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _connect(self):
+        import psycopg2
+
+        connection = psycopg2.connect(self.dsn)
+        connection.autocommit = True
+        return connection
+
+    def notify(self, group_id, message_ids):
+        message_ids = [str(message_id) for message_id in message_ids]
+        with self._send_lock:
+            try:
+                if self._sender is None or self._sender.closed:
+                    self._sender = self._connect()
+                with self._sender.cursor() as cursor:
+                    for start in range(0, len(message_ids), NOTIFY_IDS_PER_PAYLOAD):
+                        payload = json.dumps({
+                            "group_id": str(group_id),
+                            "ids": message_ids[start:start + NOTIFY_IDS_PER_PAYLOAD],
+                        })
+                        cursor.execute("select pg_notify(%s, %s)", (self.channel, payload))
+            except Exception:
+                if self._sender is not None:
+                    self._sender.close()
+                    self._sender = None
+                raise
+
+    def start(self):
+        self._thread = threading.Thread(target=self._listen, name="notify-relay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        with self._send_lock:
+            if self._sender is not None:
+                self._sender.close()
+                self._sender = None
+
+    def _listen(self):
+        connected_before = False
+        while not self._stopped.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(f"listen {self.channel}")
+                if connected_before:
+                    broker.close()  # Notifications may have been missed
+                connected_before = True
+
+                while not self._stopped.is_set():
+                    if select.select([connection], [], [], RELAY_RECONNECT_SECONDS) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notice = json.loads(connection.notifies.pop(0).payload)
+                        deliver_messages(self.supabase, notice["group_id"], notice["ids"])
+            except Exception as e:
+                print(f"Error in NotifyRelay, reconnecting: {e}")
+                self._stopped.wait(RELAY_RECONNECT_SECONDS)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+relay = None
+
+
+def start_relay(supabase):
+    """Starts this process's LISTEN/NOTIFY relay when DATABASE_URL is set. Returns it, or None."""
+    global relay
+    if DATABASE_URL and relay is None:
+        relay = NotifyRelay(DATABASE_URL, supabase).start()
+    return relay
+
+
+def stop_relay():
+    global relay
+    if relay is not None:
+        relay.stop()
+        relay = None
+
+
+def publish_messages(supabase, group_id, message_ids):
+    """
+    Announces freshly inserted messages to every subscribed client: through
+    the relay to all processes when one is running, else to this process's.
+    """
+    if not message_ids:
+        return
+    if relay is not None:
+        try:
+            relay.notify(group_id, message_ids)
+            return
+        except Exception as e:
+            print(f"Error notifying other processes, pushing locally: {e}")
+    deliver_messages(supabase, group_id, message_ids)
+
+
+def deliver_messages(supabase, group_id, message_ids):
+    """Loads messages with sender data and pushes them to this process's subscribers of the group."""
+    if not broker.has_subscribers(group_id):
+        return
+
+    from routes.messeges import MESSAGE_SELECT, hydrate_messages
+
+    try:
+        response = (
+            supabase.table("messages")
+            .select(MESSAGE_SELECT)
+            .in_("id", list(message_ids))
+            .order("timestamp", desc=False)
+            .order("id", desc=False)
+            .execute()
+        )
+        broker.publish(group_id, hydrate_messages(response.data))
+    except Exception as e:
+        # Push is best effort; clients still catch up through since-cursor reads
+        print(f"Error in deliver_messages: {e}")
+
+
+def sse_event(event, data, event_id=None):
+    """Serializes one Server-Sent Event with a JSON payload."""
+    prefix = f"id: {event_id}\n" if event_id else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def format_event(message, cursor):
+    """Serializes a message as a Server-Sent Event whose id is its keyset cursor."""
+    return sse_event("message", message, cursor)
@@ -0,0 +1,222 @@
+from flask import Blueprint, request, jsonify, current_app
+import io
+import os
+import csv
+import uuid
+from routes.auth import validate_email, validate_password
+from routes.passwords import hash_many
+from routes.session import current_identity
+
+roster_bp = Blueprint("roster", __name__)
+
+MAX_ROSTER_ROWS = int(os.getenv("MAX_ROSTER_ROWS", "5000"))
+# Accounts created per import_users call (one transaction), and emails per in_() query
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+ROSTER_FIELDS = ("name", "email", "password", "role", "semester", "roll_number", "department", "is_available")
+
+
+class RosterError(ValueError):
+    pass
+
+
+def parse_roster(req):
+    """
+    Rows of the uploaded roster: a CSV file ("file" form field or a text/csv
+    body, header row required) or JSON, either a list of users or {"users": [...]}.
+    """
+    if "file" in req.files:
+        return parse_csv(req.files["file"].read().decode("utf-8-sig"))
+    if req.mimetype == "text/csv":
+        return parse_csv(req.get_data(as_text=True))
+
+    data = req.get_json(silent=True)
+    rows = data.get("users") if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise RosterError("Expected a CSV file or a JSON list of users")
+    return rows
+
+
+def parse_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise RosterError("The CSV roster has no header row")
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    return [{key: (value or "").strip() for key, value in row.items() if key} for row in reader]
+
+
+def parse_bool(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def clean_row(row):
+    """Normalizes one roster row. Returns (row, errors) with signup's error format."""
+    row = {field: row.get(field) for field in ROSTER_FIELDS}
+    for field in ("name", "email", "role"):
+        row[field] = str(row[field]).strip() if row[field] is not None else ""
+    row["is_available"] = parse_bool(row["is_available"])
+
+    errors = []
+    for field in ("name", "email", "password", "role"):
+        if not row[field]:
+            errors.append({"field": field, "message": f"{field.capitalize()} is required"})
+    if row["role"] and row["role"] not in ("student", "teacher"):
+        errors.append({"field": "role", "message": "Role must be 'student' or 'teacher'"})
+    if row["email"] and not validate_email(row["email"]):
+        errors.append({"field": "email", "message": "Invalid email format"})
+    if row["password"] and not validate_password(str(row["password"])):
+        errors.append({
+            "field": "password",
+            "message": "The password must contain 8 letters, with 1 symbol, 1 lower case character, 1 upper case character, and 1 number",
+        })
+    if row["role"] == "student" and row["semester"] in (None, ""):
+        errors.append({"field": "semester", "message": "Semester is required"})
+    return row, errors
+
+
+def existing_emails(supabase, emails):
+    """The subset of emails already registered, with one in_() query per IMPORT_BATCH_SIZE emails."""
+    emails = list(emails)
+    found = set()
+    for start in range(0, len(emails), IMPORT_BATCH_SIZE):
+        response = (
+            supabase.table("users")
+            .select("email")
+            .in_("email", emails[start:start + IMPORT_BATCH_SIZE])
+            .execute()
+        )
+        found.update(row["email"] for row in response.data)
+    return found
+
+
+def insert_accounts(supabase, accounts):
+    """Creates a batch of accounts in one transaction (see sql/import_users.sql)."""
+    supabase.rpc("import_users", {
+        "p_users": [account["user"] for account in accounts],
+        "p_students": [account["role_row"] for account in accounts if account["user"]["role"] == "student"],
+        "p_teachers": [account["role_row"] for account in accounts if account["user"]["role"] == "teacher"],
+    }).execute()
+
+
+def insert_error(error):
+    """A failed row insert as a {"field", "message"} error, like the validation errors."""
+    message = getattr(error, "message", None) or str(error)
+    # 23505: unique_violation, e.g. an account signed up since existing_emails() ran
+    if getattr(error, "code", None) == "23505" and "email" in message:
+        return {"field": "email", "message": "Email already registered"}
+    return {"field": None, "message": message}
+
+
+def import_roster(supabase, rows):
+    """Validates, hashes and creates every account of a roster. Returns one result per row."""
+    results = []
+    valid = []  # (result, row)
+    seen = set()
+    for number, raw in enumerate(rows, start=1):
+        row, errors = clean_row(raw)
+        result = {"row": number, "email": row["email"] or None}
+        results.append(result)
+
+        email_key = row["email"].lower()
+        if email_key:
+            if email_key in seen:
+                errors.append({"field": "email", "message": "Duplicate email in roster"})
+            seen.add(email_key)
+
+        if errors:
+            result.update(status="failed", errors=errors)
+        else:
+            valid.append((result, row))
+
+    # One set query for every email, instead of one per signup
+    taken = existing_emails(supabase, [row["email"] for _, row in valid])
+    pending = []
+    for result, row in valid:
+        if row["email"] in taken:
+            result.update(status="failed", errors=[{"field": "email", "message": "Email already registered"}])
+        else:
+            pending.append((result, row))
+
+    hashes = hash_many(str(row["password"]) for _, row in pending)
+
+    accounts = []
+    for (result, row), password_hash in zip(pending, hashes):
+        user_id = str(uuid.uuid4())
+        role_row = {"id": str(uuid.uuid4()), "user_id": user_id}
+        if row["role"] == "teacher":
+            role_row["is_available"] = row["is_available"]
+        accounts.append({
+            "result": result,
+            "user": {
+                "id": user_id,
+                "name": row["name"],
+                "email": row["email"],
+                "password_hash": password_hash,
+                "role": row["role"],
+            },
+            "role_row": role_row,
+        })
+
+    for start in range(0, len(accounts), IMPORT_BATCH_SIZE):
+        batch = accounts[start:start + IMPORT_BATCH_SIZE]
+        try:
+            insert_accounts(supabase, batch)
+            created = batch
+        except Exception as e:
+            # Something in the batch was rejected (e.g. a concurrent signup):
+            # retry row by row so only the offending rows fail
+            print(f"Roster batch failed, retrying row by row: {e}")
+            created = []
+            for account in batch:
+                try:
+                    insert_accounts(supabase, [account])
+                    created.append(account)
+                except Exception as row_error:
+                    account["result"].update(status="failed", errors=[insert_error(row_error)])
+
+        for account in created:
+            account["result"].update(
+                status="created", user_id=account["user"]["id"], role=account["user"]["role"]
+            )
+
+    return results
+
+
+@roster_bp.route("/import", methods=["POST"])
+def import_users():
+    """
+    Bulk signup for a cohort. Takes a CSV or JSON roster with signup's fields
+    (name, email, password, role, semester, roll_number, department, is_available).
+    Requires a teacher's session token.
+    Returns:
+        200: {"created", "failed", "results"} with one result per roster row
+        400: Unreadable or oversized roster
+        403: Not a teacher
+        500: Server error
+    """
+    supabase = current_app.config["supabase_client"]
+    try:
+        identity = current_identity()
+        if not identity or identity["role"] != "teacher":
+            return jsonify({"error": "Only teachers can import rosters"}), 403
+
+        rows = parse_roster(request)
+        if not rows:
+            return jsonify({"error": "The roster is empty"}), 400
+        if len(rows) > MAX_ROSTER_ROWS:
+            return jsonify({"error": f"Rosters are limited to {MAX_ROSTER_ROWS} rows"}), 400
+
+        results = import_roster(supabase, rows)
+        created = sum(1 for result in results if result["status"] == "created")
+
+        return jsonify({
+            "created": created,
+            "failed": len(results) - created,
+            "results": results,
+        }), 200
+
+    except RosterError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
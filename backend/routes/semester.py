@@ -1,17 +1,100 @@
-
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app
+import json
+import time
+import hashlib
+import threading
+from routes.session import current_identity
 
 semester_bp = Blueprint("semester", __name__)
 
+SEMESTER_CACHE_TTL_SECONDS = 600
+# Unknown ids trigger a reload, but no more often than this
+SEMESTER_MISS_REFRESH_SECONDS = 10
+
+
+class SemesterCache:
+    """
+    Loaded-once copy of the semesters table.
+
+    Rows are reloaded after the TTL, on explicit refresh(), or when an unknown
+    id is requested. version is a content hash, so it is identical across
+    workers holding the same data.
+    """
+
+    def __init__(self, ttl=SEMESTER_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self.version = None
+        self._lock = threading.Lock()
+        self._rows = []
+        self._by_id = {}
+        self._loaded_at = 0.0
+
+    def refresh(self, supabase):
+        rows = supabase.table("semesters").select("*").execute().data
+        digest = hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode("utf-8"))
+        with self._lock:
+            self._rows = rows
+            self._by_id = {row["id"]: row for row in rows}
+            self._loaded_at = time.monotonic()
+            self.version = digest.hexdigest()[:16]
+        return rows
+
+    def _age(self):
+        return time.monotonic() - self._loaded_at
+
+    def all(self, supabase):
+        if self.version is None or self._age() > self.ttl:
+            return self.refresh(supabase)
+        return self._rows
+
+    def get(self, supabase, semester_id):
+        """Returns the semester row for an id, or None."""
+        self.all(supabase)
+        row = self._by_id.get(semester_id)
+        if row is None and semester_id and self._age() > SEMESTER_MISS_REFRESH_SECONDS:
+            self.refresh(supabase)
+            row = self._by_id.get(semester_id)
+        return row
+
+    def semester_number(self, supabase, semester_id):
+        row = self.get(supabase, semester_id)
+        return row["semester_number"] if row else None
+
+
+semester_cache = SemesterCache()
+
+
 @semester_bp.route("/", methods=["GET"])
 def get_semesters():
     supabase = current_app.config["supabase_client"]
     try:
-        response = supabase.table("semesters").select("*").execute()
-        semesters = response.data
-        return jsonify(semesters), 200
+        semesters = semester_cache.all(supabase)
+        response = jsonify(semesters)
+        response.set_etag(semester_cache.version)
+        return response.make_conditional(request)
     except Exception as e:
-        return jsonify({"error": str(e)}), 
+        return jsonify({"error": str(e)}), 500
+
+
+@semester_bp.route("/refresh", methods=["POST"])
+def refresh_semesters():
+    """
+    Reloads the semester cache after the semesters table was edited.
+    Requires a teacher's session token. The cache lives in each API process,
+    so this refreshes only the process that serves the request; the others
+    pick up the change within SEMESTER_CACHE_TTL_SECONDS, or at once when
+    asked for a semester id they do not know yet.
+    """
+    supabase = current_app.config["supabase_client"]
+    identity = current_identity()
+    if not identity or identity["role"] != "teacher":
+        return jsonify({"error": "Only teachers can refresh semesters"}), 403
+
+    try:
+        semesters = semester_cache.refresh(supabase)
+        return jsonify({"version": semester_cache.version, "count": len(semesters)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 
 @semester_bp.route("/<group_id>", methods=["GET"])
@@ -26,12 +109,11 @@ def get_semester(group_id):
         group_data = response.data[0]
         semester_id = group_data["semester_id"]
 
-        semester_response = supabase.table("semesters").select("*").eq("id", semester_id).execute()
+        semester = semester_cache.get(supabase, semester_id)
 
-        if not semester_response.data:
+        if not semester:
             return jsonify({"error": "Semester not found"}), 404
 
-        semester = semester_response.data[0]
         return jsonify(semester), 200
 
     except Exception as e:
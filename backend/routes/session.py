@@ -0,0 +1,59 @@
+import os
+from flask import current_app, g, request, jsonify
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+
+SESSION_TOKEN_MAX_AGE = int(os.getenv("SESSION_TOKEN_MAX_AGE", str(12 * 60 * 60)))
+ROLE_TABLES = {"teacher": "teachers", "student": "students"}
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt="session-token")
+
+
+def issue_token(user_id, role, role_id):
+    """Signed token identifying the user, their role and their teacher/student id."""
+    return _serializer().dumps({"user_id": user_id, "role": role, "role_id": role_id})
+
+
+def load_identity():
+    """
+    before_request hook: verifies the "Authorization: Bearer <token>" header
+    and stores its identity in g.identity. Requests without a token pass
+    through with g.identity = None; bad or expired tokens get 401.
+    """
+    g.identity = None
+    header = request.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None
+
+    try:
+        g.identity = _serializer().loads(header[len("Bearer "):], max_age=SESSION_TOKEN_MAX_AGE)
+    except SignatureExpired:
+        return jsonify({"error": "Session expired, please log in again"}), 401
+    except BadSignature:
+        return jsonify({"error": "Invalid session token"}), 401
+    return None
+
+
+def current_identity():
+    return g.get("identity")
+
+
+def request_user_id(fallback):
+    """The token's user id, or fallback (a user_id request field) for token-less clients."""
+    identity = current_identity()
+    return identity["user_id"] if identity else fallback
+
+
+def role_id_of(supabase, role, user_id):
+    """
+    The teacher or student id of user_id: read from the session token when it
+    belongs to that user, otherwise looked up. None if the user has no such role.
+    """
+    identity = current_identity()
+    if identity and identity["user_id"] == user_id and identity["role"] == role:
+        return identity["role_id"]
+
+    response = supabase.table(ROLE_TABLES[role]).select("id").eq("user_id", user_id).execute()
+    return response.data[0]["id"] if response.data else None
@@ -1,8 +1,11 @@
 
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app
+from routes.group_stats import STATS_SELECT, stats_of
+from routes.loaders import get_loaders
 teacher_bp = Blueprint("teacher", __name__)
 @teacher_bp.route("/groups", methods=["GET"])
 def get_teacher_groups():
+    supabase = current_app.config["supabase_client"]
     teacher_id = request.args.get("teacher_id")
     
     if not teacher_id:
@@ -11,30 +14,23 @@ def get_teacher_groups():
     try:
         # Fetch groups that have this teacher
         groups_response = supabase.table("groups").select(
-            "id, group_type, subject_name, teacher_id, semester_id"
+            f"id, group_type, subject_name, teacher_id, semester_id, {STATS_SELECT}"
         ).eq("teacher_id", teacher_id).execute()
         
         if hasattr(groups_response, "error") and groups_response.error:
             return jsonify({"error": groups_response.error}), 500
         
         groups = groups_response.data
+        loaders = get_loaders()
         
         # For each group, get semester details
         enhanced_groups = []
         for group in groups:
             # Get semester info
-            semester_response = supabase.table("semesters").select(
-                "id, semester_number"
-            ).eq("id", group["semester_id"]).execute()
-            
-            semester = semester_response.data[0] if semester_response.data else None
+            semester = loaders.semesters.get(group["semester_id"])
             
-            # Get count of students in this group
-            students_count_response = supabase.table("group_members").select(
-                "id", count="exact"
-            ).eq("group_id", group["id"]).execute()
-            
-            students_count = students_count_response.count if hasattr(students_count_response, "count") else 0
+            # Student count comes from the group_stats projection
+            stats = stats_of(group)
             
             # Get recent messages
             recent_messages_response = supabase.table("messages").select(
@@ -47,7 +43,7 @@ def get_teacher_groups():
             enhanced_group = {
                 **group,
                 "semester": semester,
-                "students_count": students_count,
+                "students_count": stats["member_count"],
                 "recent_messages": recent_messages
             }
             
@@ -120,6 +116,7 @@ def organize_groups_by_semester(groups):
 
 @teacher_bp.route("/api/group/details", methods=["GET"])
 def get_group_details():
+    supabase = current_app.config["supabase_client"]
     group_id = request.args.get("group_id")
     
     if not group_id:
@@ -136,69 +133,46 @@ def get_group_details():
         
         group = group_response.data[0]
         
-        # Get teacher info
-        teacher_response = supabase.table("teachers").select(
-            "id, user_id, is_available"
-        ).eq("id", group["teacher_id"]).execute()
-        
-        teacher = None
-        if teacher_response.data:
-            teacher_data = teacher_response.data[0]
-            user_response = supabase.table("users").select(
-                "id, name, email"
-            ).eq("id", teacher_data["user_id"]).execute()
-            
-            if user_response.data:
-                teacher = {
-                    "id": teacher_data["id"],
-                    "name": user_response.data[0]["name"],
-                    "email": user_response.data[0]["email"],
-                    "avatar": f"/placeholder.svg?height=40&width=40",
-                    "is_available": teacher_data["is_available"]
-                }
-        
         # Get messages for this group
         messages_response = supabase.table("messages").select(
             "id, content, timestamp, sender_id, sender_role"
-        ).eq("group_id", group_id).order("timestamp", asc=True).execute()
+        ).eq("group_id", group_id).order("timestamp", desc=False).execute()
+        
+        # Queue every teacher and student id first, so the loaders resolve
+        # them (and then their users) in one query per table
+        loaders = get_loaders()
+        teacher_ids = {group["teacher_id"]}
+        teacher_ids.update(msg["sender_id"] for msg in messages_response.data if msg["sender_role"] == "teacher")
+        student_ids = {msg["sender_id"] for msg in messages_response.data if msg["sender_role"] == "student"}
+        role_rows = loaders.teachers.get_many(teacher_ids) + loaders.students.get_many(student_ids)
+        loaders.users.prime(row["user_id"] for row in role_rows if row)
+        role_loaders = {"teacher": loaders.teachers, "student": loaders.students}
+        
+        # Get teacher info
+        teacher = None
+        teacher_data = loaders.teachers.get(group["teacher_id"])
+        teacher_user = loaders.users.get(teacher_data["user_id"]) if teacher_data else None
+        if teacher_user:
+            teacher = {
+                "id": teacher_data["id"],
+                "name": teacher_user["name"],
+                "email": teacher_user["email"],
+                "avatar": f"/placeholder.svg?height=40&width=40",
+                "is_available": teacher_data["is_available"]
+            }
         
         messages = []
         for msg in messages_response.data:
             sender = None
-            if msg["sender_role"] == "teacher":
-                teacher_user_response = supabase.table("teachers").select(
-                    "user_id"
-                ).eq("id", msg["sender_id"]).execute()
-                
-                if teacher_user_response.data:
-                    user_id = teacher_user_response.data[0]["user_id"]
-                    user_response = supabase.table("users").select(
-                        "name"
-                    ).eq("id", user_id).execute()
-                    
-                    if user_response.data:
-                        sender = {
-                            "id": msg["sender_id"],
-                            "name": user_response.data[0]["name"],
-                            "avatar": f"/placeholder.svg?height=40&width=40"
-                        }
-            elif msg["sender_role"] == "student":
-                student_user_response = supabase.table("students").select(
-                    "user_id"
-                ).eq("id", msg["sender_id"]).execute()
-                
-                if student_user_response.data:
-                    user_id = student_user_response.data[0]["user_id"]
-                    user_response = supabase.table("users").select(
-                        "name"
-                    ).eq("id", user_id).execute()
-                    
-                    if user_response.data:
-                        sender = {
-                            "id": msg["sender_id"],
-                            "name": user_response.data[0]["name"],
-                            "avatar": f"/placeholder.svg?height=40&width=40"
-                        }
+            role_loader = role_loaders.get(msg["sender_role"])
+            role_row = role_loader.get(msg["sender_id"]) if role_loader else None
+            sender_user = loaders.users.get(role_row["user_id"]) if role_row else None
+            if sender_user:
+                sender = {
+                    "id": msg["sender_id"],
+                    "name": sender_user["name"],
+                    "avatar": f"/placeholder.svg?height=40&width=40"
+                }
             
             if sender:
                 messages.append({
@@ -209,10 +183,7 @@ def get_group_details():
                 })
         
         # Prepare group details response
-        semester_response = supabase.table("semesters").select(
-            "semester_number"
-        ).eq("id", group["semester_id"]).execute()
-        semester_number = semester_response.data[0]["semester_number"] if semester_response.data else None
+        semester_number = loaders.semesters.semester_number(group["semester_id"])
         
         group_details = {
             "id": group["id"],
@@ -0,0 +1,350 @@
+import os
+import json
+import uuid
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+try:
+    import fcntl  # Cross-process append lock; not available on Windows
+except ImportError:
+    fcntl = None
+
+
+# Ideally shared by every API and ingest worker host; a host-local directory
+# still converges through catch_up(), just CATCHUP_INTERVAL_SECONDS later
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "./vector_index")
+BUILD_PAGE_SIZE = 500
+# Ids per in_() query when catch_up() fetches the vectors of unknown rows
+FETCH_IDS_PER_QUERY = 100
+# How often a search first pulls rows embedded by other hosts
+CATCHUP_INTERVAL_SECONDS = float(os.getenv("VECTOR_INDEX_CATCHUP_SECONDS", "30"))
+# embedded_at is stamped before commit, so a row can become visible after
+# rows stamped later; while the high-water mark is this recent, catch-up
+# re-lists (ids only) the rows embedded since now minus this
+COMMIT_SLACK_SECONDS = 120
+DTYPE = np.float32
+
+
+def parse_embedding(value):
+    """PostgREST returns pgvector columns as a string such as "[0.1,0.2]"."""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def later(a, b):
+    """The later of two ISO timestamps, either of which may be None."""
+    if not a or not b:
+        return a or b
+    return a if parse_time(a) >= parse_time(b) else b
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class GroupIndex:
+    """
+    Unit-normalized embedding matrix of one group, persisted as:
+        <group>.json   header ({"dim": d, "complete": bool, "embedded_at": mark})
+        <group>.f32    raw float32 rows, appended in place and memory-mapped
+        <group>.jsonl  one {"id", "content", "timestamp"} line per row, same order
+    Rows are appended vectors first, so a reader only trusts as many rows as
+    both files contain. "complete" is only set once build() has read the
+    whole group; until then searches (re)run the build, which skips rows
+    already indexed. "embedded_at" is the high-water mark of
+    messages.embedded_at fetched so far, from which catch_up() pages forward.
+    """
+
+    def __init__(self, directory, group_id):
+        base = os.path.join(directory, group_id)
+        self.header_path = f"{base}.json"
+        self.vectors_path = f"{base}.f32"
+        self.rows_path = f"{base}.jsonl"
+        self.lock_path = f"{base}.lock"
+        self.dim = None
+        self._matrix = None
+        self._rows = []
+        self._ids = set()
+        self._complete = False
+        self._caught_up_at = 0.0
+        self._rows_offset = 0
+        self._vectors_size = -1
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.header_path)
+
+    def _header(self):
+        with open(self.header_path) as f:
+            return json.load(f)
+
+    def is_complete(self):
+        if not self._complete and self.exists():
+            self._complete = bool(self._header().get("complete"))
+        return self._complete
+
+    def __len__(self):
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    def _sync(self):
+        """Maps rows appended to disk since the last call, by this or another process."""
+        if self.dim is None:
+            if not self.exists():
+                return
+            with open(self.header_path) as f:
+                self.dim = json.load(f)["dim"]
+
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if size == self._vectors_size:
+            return
+
+        if os.path.exists(self.rows_path):
+            with open(self.rows_path, "rb") as f:
+                f.seek(self._rows_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Partially written by a concurrent append
+                    row = json.loads(line)
+                    self._rows.append((row["id"], row["content"], row.get("timestamp")))
+                    self._ids.add(row["id"])
+                    self._rows_offset += len(line)
+
+        count = min(len(self._rows), size // (self.dim * DTYPE().itemsize))
+        self._matrix = (
+            np.memmap(self.vectors_path, dtype=DTYPE, mode="r", shape=(count, self.dim))
+            if count else None
+        )
+        self._vectors_size = size
+
+    def _file_lock(self):
+        handle = open(self.lock_path, "a")
+        if fcntl:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    def _write_header(self, dim, complete, embedded_at=None):
+        with open(self.header_path, "w") as f:
+            json.dump({"dim": dim, "complete": complete, "embedded_at": embedded_at}, f)
+
+    def _advance_mark(self, embedded_at, complete=None):
+        """Moves the persisted high-water mark forward (never back; another process may be ahead)."""
+        with self._lock:
+            lock = self._file_lock()
+            try:
+                self._sync()
+                if self.dim is None:
+                    return
+                header = self._header()
+                complete = header.get("complete") if complete is None else complete
+                self._write_header(self.dim, complete, later(header.get("embedded_at"), embedded_at))
+                self._complete = bool(complete)
+            finally:
+                lock.close()
+
+    def append(self, rows):
+        """Adds (id, content, embedding, timestamp) rows, skipping ids already indexed."""
+        rows = [
+            (row_id, content, parse_embedding(embedding), timestamp)
+            for row_id, content, embedding, timestamp in rows
+        ]
+        rows = [row for row in rows if row[2] is not None and len(row[2])]
+        if not rows:
+            return 0
+
+        with self._lock:
+            lock = self._file_lock()
+            try:
+                if not self.exists():
+                    self._write_header(len(rows[0][2]), complete=False)
+                self._sync()
+
+                fresh, seen = [], set()
+                for row in rows:
+                    if row[0] not in self._ids and row[0] not in seen and len(row[2]) == self.dim:
+                        fresh.append(row)
+                        seen.add(row[0])
+                if not fresh:
+                    return 0
+
+                vectors = normalize(np.asarray([row[2] for row in fresh], dtype=DTYPE))
+                with open(self.vectors_path, "ab") as f:
+                    f.write(vectors.tobytes())
+                with open(self.rows_path, "ab") as f:
+                    for row_id, content, _, timestamp in fresh:
+                        line = {"id": row_id, "content": content, "timestamp": timestamp}
+                        f.write(json.dumps(line).encode("utf-8") + b"\n")
+
+                self._sync()
+                return len(fresh)
+            finally:
+                lock.close()
+
+    def search(self, query_embedding, k, min_score):
+        """
+        Returns up to k (id, content, score, timestamp) tuples by cosine
+        similarity, best first. timestamp is the message's, or None for rows
+        indexed before timestamps were stored.
+        """
+        with self._lock:
+            self._sync()
+            matrix, rows = self._matrix, self._rows
+
+        if matrix is None or not len(query_embedding) or len(query_embedding) != self.dim:
+            return []
+
+        query = normalize(np.asarray(query_embedding, dtype=DTYPE))
+        scores = matrix @ query
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            (rows[i][0], rows[i][1], float(scores[i]), rows[i][2])
+            for i in top
+            if scores[i] >= min_score
+        ]
+
+    def build(self, supabase, group_id):
+        """
+        Backfills the index from the group's embedded messages in Supabase,
+        oldest first, and only then marks it complete. An interrupted build is
+        simply rerun.
+        """
+        mark = None
+        cursor = None
+        while True:
+            query = (
+                supabase.table("messages")
+                .select("id, content, embedding, timestamp, embedded_at")
+                .eq("group_id", group_id)
+                .not_.is_("embedding", "null")
+            )
+            if cursor:
+                timestamp, row_id = cursor
+                query = query.or_(f'timestamp.gt."{timestamp}",and(timestamp.eq."{timestamp}",id.gt.{row_id})')
+            rows = (
+                query.order("timestamp", desc=False)
+                .order("id", desc=False)
+                .limit(BUILD_PAGE_SIZE)
+                .execute()
+            ).data
+            self.append([(row["id"], row["content"], row["embedding"], row["timestamp"]) for row in rows])
+            for row in rows:
+                mark = later(mark, row.get("embedded_at"))
+            if len(rows) < BUILD_PAGE_SIZE:
+                break
+            cursor = (rows[-1]["timestamp"], rows[-1]["id"])
+
+        self._advance_mark(mark, complete=True)
+        self._caught_up_at = time.monotonic()
+
+    def catch_up(self, supabase, group_id):
+        """
+        Appends rows embedded elsewhere (another API host, the ingest worker,
+        late retries of the embedding worker), at most once per
+        CATCHUP_INTERVAL_SECONDS. Lists the ids embedded after the persisted
+        mark and downloads vectors only for rows not indexed yet, so a quiet
+        group costs one small query.
+        """
+        if time.monotonic() - self._caught_up_at < CATCHUP_INTERVAL_SECONDS:
+            return
+        self._caught_up_at = time.monotonic()
+
+        mark = self._header().get("embedded_at")
+        since = mark
+        if mark:
+            slack = datetime.now(timezone.utc) - timedelta(seconds=COMMIT_SLACK_SECONDS)
+            if parse_time(mark) > slack:
+                since = slack.isoformat()
+
+        newest, cursor = mark, None
+        while True:
+            query = (
+                supabase.table("messages")
+                .select("id, embedded_at")
+                .eq("group_id", group_id)
+                .not_.is_("embedded_at", "null")
+            )
+            if since:
+                query = query.gt("embedded_at", since)
+            if cursor:
+                embedded_at, row_id = cursor
+                query = query.or_(f'embedded_at.gt."{embedded_at}",and(embedded_at.eq."{embedded_at}",id.gt.{row_id})')
+            rows = (
+                query.order("embedded_at", desc=False)
+                .order("id", desc=False)
+                .limit(BUILD_PAGE_SIZE)
+                .execute()
+            ).data
+
+            with self._lock:
+                self._sync()
+                missing = [row["id"] for row in rows if row["id"] not in self._ids]
+            for start in range(0, len(missing), FETCH_IDS_PER_QUERY):
+                fetched = (
+                    supabase.table("messages")
+                    .select("id, content, embedding, timestamp")
+                    .in_("id", missing[start:start + FETCH_IDS_PER_QUERY])
+                    .order("timestamp", desc=False)
+                    .execute()
+                ).data
+                self.append([(row["id"], row["content"], row["embedding"], row["timestamp"]) for row in fetched])
+
+            for row in rows:
+                newest = later(newest, row["embedded_at"])
+            if len(rows) < BUILD_PAGE_SIZE:
+                break
+            cursor = (rows[-1]["embedded_at"], rows[-1]["id"])
+
+        if newest != mark:
+            self._advance_mark(newest)
+
+
+class VectorIndex:
+    """Registry of per-group indexes stored under one directory."""
+
+    def __init__(self, directory=VECTOR_INDEX_DIR):
+        self.directory = directory
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def group(self, group_id):
+        group_id = str(uuid.UUID(str(group_id)))  # Also keeps file names safe
+        with self._lock:
+            index = self._groups.get(group_id)
+            if index is None:
+                os.makedirs(self.directory, exist_ok=True)
+                index = self._groups[group_id] = GroupIndex(self.directory, group_id)
+            return index
+
+    def append(self, group_id, rows):
+        """
+        Adds new (id, content, embedding, timestamp) rows to a group's index.
+        Groups not indexed yet are skipped; build() picks them up.
+        """
+        try:
+            index = self.group(group_id)
+            if index.exists():
+                index.append(rows)
+        except Exception as e:
+            print(f"Error in VectorIndex.append: {e}")
+
+    def search(self, supabase, group_id, query_embedding, k, min_score):
+        index = self.group(group_id)
+        if not index.is_complete():
+            index.build(supabase, group_id)
+        else:
+            index.catch_up(supabase, group_id)
+        return index.search(query_embedding, k, min_score)
+
+
+vector_index = VectorIndex()
@@ -1,30 +1,72 @@
 import os
+import secrets
 from flask import Flask
 from flask_cors import CORS
-from supabase import create_client
+from dotenv import load_dotenv
+
+# Before the route imports: their settings are read from the environment at import time
+load_dotenv()
 
 from routes.auth import auth_bp
 from routes.gemini import gemini_bp
-from routes.gemini import setup_gemini
+from routes.gemini import MAX_UPLOAD_BYTES, ingestion_jobs
 from routes.group import group_bp  
 from routes.messeges import message_bp
 from routes.semester import semester_bp
 from routes.teacher import teacher_bp
-from dotenv import load_dotenv
-
-load_dotenv()
+from routes.roster import roster_bp
+from routes.embeddings import start_embedding_worker
+from routes.jobs import INGESTION_MODE
+from routes.session import load_identity
+from routes.realtime import broker, start_relay, stop_relay
+from routes.clients import create_supabase_client, close_supabase_client
 
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Development mode (python run.py, or FLASK_DEBUG=1) may run without SECRET_KEY
+DEV_MODE = os.getenv("FLASK_DEBUG") == "1"
+
+
+def session_secret_key(dev_mode):
+    """
+    SECRET_KEY signs session tokens, so every worker must share it, and it
+    must never be a value anyone else knows. Refuses to start without it
+    outside development, where a random per-process key is used instead.
+    """
+    key = os.getenv("SECRET_KEY")
+    if key:
+        return key
+    if not dev_mode:
+        raise RuntimeError("SECRET_KEY is not set; it is required to sign session tokens")
+    print("SECRET_KEY is not set; using a random development key (sessions end on restart)")
+    return secrets.token_urlsafe(64)
 
-def create_app():
+def create_base_app(dev_mode=DEV_MODE):
+    """Flask app with the settings, client and hooks shared by the API and the stream server."""
     app = Flask(__name__)
     CORS(app, resources={r"/*": {"origins": "*"}})  
-    app.secret_key = "ZxdGH4cMyAJRL2ee5kIPXjdOlMfBEpYtTzeNA10HtTUAWzW3G8j3JKktxfd3s9ELj7xQPRpNN/yk4gIUhrHY9w=="
-    app.config["supabase_client"] = create_client(SUPABASE_URL, SUPABASE_KEY)
-    app.config["gemini_model"] = setup_gemini()  
-    app.secret_key = "ZxdGH4cMyAJRL2ee5kIPXjdOlMfBEpYtTzeNA10HtTUAWzW3G8j3JKktxfd3s9ELj7xQPRpNN/yk4gIUhrHY9w=="
+    app.secret_key = session_secret_key(dev_mode)
+    # One pooled client per process (see gunicorn.conf.py: workers build their own after fork)
+    app.config["supabase_client"] = create_supabase_client(SUPABASE_URL, SUPABASE_KEY)
+    # With DATABASE_URL, messages inserted by any process reach this one's streams
+    start_relay(app.config["supabase_client"])
+
+    # Resolves "Authorization: Bearer <token>" into g.identity for every route
+    app.before_request(load_identity)
+    return app
+
+def create_app(dev_mode=DEV_MODE):
+    app = create_base_app(dev_mode)
+    # Oversized uploads are rejected with 413 before the body is read
+    app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+    # The Gemini model is created on first use (routes.gemini.get_gemini_model).
+    # With INGESTION_MODE=worker, ingest_worker.py embeds messages and runs uploads.
+    app.config["embedding_worker"] = None
+    if INGESTION_MODE == "inline":
+        app.config["embedding_worker"] = start_embedding_worker(app.config["supabase_client"])
+        # Also picks up jobs queued before a restart or released by another worker
+        ingestion_jobs.start(app.config["supabase_client"])
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(gemini_bp, url_prefix="/api/gemini")
@@ -32,10 +74,38 @@ def create_app():
     app.register_blueprint(message_bp, url_prefix="/api/messages") 
     app.register_blueprint(semester_bp, url_prefix="/api/semesters")
     app.register_blueprint(teacher_bp,url_prefix="/api/teachers")
+    app.register_blueprint(roster_bp, url_prefix="/api/roster")
+
+    return app
+
 
+def create_stream_app():
+    """
+    Only the message routes, for a separate server that holds the
+    /api/messages/stream connections on gevent workers (see stream_wsgi.py).
+    """
+    app = create_base_app()
+    app.register_blueprint(message_bp, url_prefix="/api/messages")
     return app
 
 
+def shutdown_app(app):
+    """Ends open streams, finishes background work and closes pooled connections."""
+    broker.close()
+    stop_relay()
+    embedding_worker = app.config.get("embedding_worker")
+    if embedding_worker:
+        embedding_worker.stop()
+    # A gunicorn worker only has graceful_timeout: hand running jobs back to
+    # the queue instead of waiting for them
+    ingestion_jobs.shutdown(wait=False)
+    ingestion_jobs.release(app.config["supabase_client"])
+    # Released jobs may still be mid-insert; closing the session under them
+    # would only turn their last writes into errors. Process exit closes it.
+    if not ingestion_jobs.running():
+        close_supabase_client(app.config["supabase_client"])
+
+
 if __name__ == "__main__":
-    app = create_app()
+    app = create_app(dev_mode=True)
     app.run(debug=True, host="0.0.0.0", port=5000)
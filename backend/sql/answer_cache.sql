@@ -0,0 +1,37 @@
+-- Turns the answers table into a group-scoped answer cache.
+-- Rows are keyed by (group_id, query_hash), where query_hash is the SHA-256
+-- of the normalized question. query_embedding allows near-duplicate
+-- questions to hit too. Uploading new material to a group marks its
+-- answers stale.
+
+create extension if not exists vector;
+
+alter table answers add column if not exists group_id uuid references groups (id) on delete cascade;
+alter table answers add column if not exists query_hash text;
+alter table answers add column if not exists query_embedding vector(768);
+alter table answers add column if not exists stale boolean not null default false;
+alter table answers add column if not exists created_at timestamptz not null default now();
+
+create index if not exists answers_group_query_hash_idx
+    on answers (group_id, query_hash) where not stale;
+
+create or replace function match_answers(
+    query_embedding vector(768),
+    p_group_id uuid,
+    match_threshold float,
+    p_since timestamptz
+) returns table (answers text, similarity float)
+language sql stable
+as $$
+    select
+        a.answers,
+        1 - (a.query_embedding <=> query_embedding) as similarity
+    from answers a
+    where a.group_id = p_group_id
+      and not a.stale
+      and a.created_at >= p_since
+      and a.query_embedding is not null
+      and 1 - (a.query_embedding <=> query_embedding) >= match_threshold
+    order by a.query_embedding <=> query_embedding
+    limit 1;
+$$;
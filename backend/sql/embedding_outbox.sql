@@ -0,0 +1,76 @@
+-- Outbox state for the background EmbeddingWorker (routes/embeddings.py).
+-- Only rows with embedding_status = 'pending' are embedded: chat messages
+-- are inserted as pending, while AI answers (status null) stay out of
+-- retrieval, and ingested chunks arrive already embedded.
+-- Failed rows are retried at embedding_next_attempt with exponential
+-- backoff, and give up as 'failed' after the worker's attempt limit.
+
+alter table messages add column if not exists embedding_status text;  -- pending, done, skipped, failed
+alter table messages add column if not exists embedding_attempts integer not null default 0;
+alter table messages add column if not exists embedding_next_attempt timestamptz not null default now();
+
+-- Existing rows still waiting for an embedding, excluding AI answers
+update messages
+set embedding_status = 'pending'
+where embedding is null
+  and embedding_status is null
+  and sender_role in ('student', 'teacher');
+
+-- The worker polls only due pending rows; keep that off the full table
+create index if not exists messages_embedding_pending_idx
+    on messages (embedding_next_attempt)
+    where embedding_status = 'pending';
+
+-- Claims a batch of due pending rows for one worker. Claimed rows are leased
+-- by pushing embedding_next_attempt p_lease_seconds ahead: other workers
+-- (every API process in inline mode, each ingest_worker.py) skip them, and
+-- rows of a worker that died become due again once the lease lapses.
+create or replace function claim_pending_embeddings(
+    p_limit integer,
+    p_lease_seconds integer default 300
+) returns setof messages
+language sql
+as $$
+    update messages m
+    set embedding_next_attempt = now() + make_interval(secs => p_lease_seconds)
+    where m.id in (
+        select id
+        from messages
+        where embedding_status = 'pending'
+          and embedding_next_attempt <= now()
+        order by embedding_next_attempt
+        limit p_limit
+        for update skip locked
+    )
+    returning m.*;
+$$;
+
+-- When a row's embedding was stored, whichever path stored it (the worker,
+-- ingestion inserts, retries). Vector indexes on other hosts page forward
+-- through it (GroupIndex.catch_up), so late embeddings are not missed.
+alter table messages add column if not exists embedded_at timestamptz;
+
+update messages
+set embedded_at = coalesce("timestamp", now())
+where embedding is not null
+  and embedded_at is null;
+
+create or replace function stamp_embedded_at() returns trigger
+language plpgsql
+as $$
+begin
+    if new.embedding is not null then
+        new.embedded_at := clock_timestamp();
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists messages_embedded_at on messages;
+create trigger messages_embedded_at
+    before insert or update of embedding on messages
+    for each row execute function stamp_embedded_at();
+
+create index if not exists messages_group_embedded_at_idx
+    on messages (group_id, embedded_at)
+    where embedded_at is not null;
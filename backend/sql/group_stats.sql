@@ -0,0 +1,65 @@
+-- Denormalized per-group counters, maintained by the API write paths
+-- (join_group, send_message, AI answers, upload ingestion) through
+-- bump_group_stats so dashboards never have to count rows.
+
+create table if not exists group_stats (
+    group_id uuid primary key references groups (id) on delete cascade,
+    member_count integer not null default 0,
+    message_count integer not null default 0,
+    last_activity timestamptz
+);
+
+-- Bumped on every membership change. API workers cache the group-details
+-- document per version, so a join on one worker is seen by all of them.
+alter table group_stats add column if not exists details_version integer not null default 0;
+
+-- Atomic increment; creates the row on first use.
+create or replace function bump_group_stats(
+    p_group_id uuid,
+    p_members integer default 0,
+    p_messages integer default 0
+) returns void
+language sql
+as $$
+    -- A group has no stats row until its first bump, and get_group_details
+    -- may already have cached it under version 0: a first membership change
+    -- must still move the version
+    insert into group_stats (group_id, member_count, message_count, last_activity, details_version)
+    values (
+        p_group_id,
+        p_members,
+        p_messages,
+        case when p_messages > 0 then now() end,
+        case when p_members <> 0 then 1 else 0 end
+    )
+    on conflict (group_id) do update set
+        member_count = group_stats.member_count + excluded.member_count,
+        message_count = group_stats.message_count + excluded.message_count,
+        last_activity = coalesce(excluded.last_activity, group_stats.last_activity),
+        details_version = group_stats.details_version
+            + case when excluded.member_count <> 0 then 1 else 0 end;
+$$;
+
+-- Recomputes one group (or every group when p_group_id is null) from the
+-- source tables. Used for the initial backfill and to repair drift.
+create or replace function refresh_group_stats(p_group_id uuid default null)
+returns void
+language sql
+as $$
+    insert into group_stats (group_id, member_count, message_count, last_activity)
+    select
+        g.id,
+        (select count(*) from group_members gm where gm.group_id = g.id),
+        (select count(*) from messages m where m.group_id = g.id),
+        (select max(m.timestamp) from messages m where m.group_id = g.id)
+    from groups g
+    where p_group_id is null or g.id = p_group_id
+    on conflict (group_id) do update set
+        member_count = excluded.member_count,
+        message_count = excluded.message_count,
+        last_activity = excluded.last_activity,
+        details_version = group_stats.details_version
+            + case when excluded.member_count <> group_stats.member_count then 1 else 0 end;
+$$;
+
+select refresh_group_stats();
@@ -0,0 +1,26 @@
+-- Bulk account creation used by POST /api/roster/import.
+-- One call inserts a batch of users and their students/teachers rows in a
+-- single transaction: either the whole batch is created or none of it.
+
+create or replace function import_users(
+    p_users jsonb,
+    p_students jsonb default '[]'::jsonb,
+    p_teachers jsonb default '[]'::jsonb
+) returns void
+language plpgsql
+as $$
+begin
+    insert into users (id, name, email, password_hash, role)
+    select id, name, email, password_hash, role
+    from jsonb_populate_recordset(null::users, p_users);
+
+    insert into students (id, user_id)
+    select id, user_id
+    from jsonb_populate_recordset(null::students, p_students);
+
+    -- Rows without is_available would otherwise insert an explicit NULL
+    insert into teachers (id, user_id, is_available)
+    select id, user_id, coalesce(is_available, true)
+    from jsonb_populate_recordset(null::teachers, p_teachers);
+end;
+$$;
@@ -0,0 +1,31 @@
+-- Background document ingestion jobs created by POST /api/gemini/upload
+-- and reported by GET /api/gemini/jobs/<job_id>.
+
+create table if not exists ingestion_jobs (
+    id uuid primary key,
+    group_id uuid references groups (id) on delete cascade,
+    sender_id uuid,
+    sender_role text,
+    filename text,
+    kind text not null default 'pdf',       -- parser: pdf or ocr
+    file_path text,                         -- upload on the shared UPLOAD_TMP_DIR
+    claimed_by text,                        -- ingestion worker running the job
+    status text not null default 'queued',  -- queued, running, done, failed
+    pages_parsed integer not null default 0,
+    chunks_total integer not null default 0,
+    chunks_embedded integer not null default 0,
+    error text,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists ingestion_jobs_group_idx on ingestion_jobs (group_id, created_at desc);
+create index if not exists ingestion_jobs_queued_idx on ingestion_jobs (created_at) where status = 'queued';
+
+-- Claim lease: claimed_at is renewed while a job runs; running jobs whose
+-- lease lapsed are requeued (see IngestionJobs.requeue_expired)
+alter table ingestion_jobs add column if not exists claimed_at timestamptz;
+alter table ingestion_jobs add column if not exists attempts integer not null default 0;
+update ingestion_jobs set claimed_at = updated_at where status = 'running' and claimed_at is null;
+
+create index if not exists ingestion_jobs_running_idx on ingestion_jobs (claimed_at) where status = 'running';
@@ -0,0 +1,54 @@
+-- Similarity search over messages.embedding (pgvector, 768 dimensions as
+-- produced by models/embedding-001). Used by fetch_relevant_content so the
+-- prompt only carries the top-k chunks of a group.
+
+create extension if not exists vector;
+
+create index if not exists messages_embedding_cosine_idx
+    on messages using hnsw (embedding vector_cosine_ops);
+
+-- Lets the planner answer small groups exactly (group rows, then sort by
+-- distance) instead of post-filtering the global HNSW scan.
+create index if not exists messages_group_embedded_idx
+    on messages (group_id)
+    where embedding is not null;
+
+-- HNSW returns ef_search candidates before the group_id filter is applied,
+-- so a group that is small relative to the table can come back with few or
+-- no matches. Widen the candidate list, and on pgvector 0.8+ let the scan
+-- keep going until enough rows pass the filter (iterative_scan).
+create or replace function match_messages(
+    query_embedding vector(768),
+    p_group_id uuid,
+    match_count integer default 8,
+    match_threshold float default 0.5
+) returns table (id uuid, content text, similarity float)
+language plpgsql stable
+as $$
+begin
+    perform set_config('hnsw.ef_search', greatest(200, match_count * 10)::text, true);
+    begin
+        perform set_config('hnsw.iterative_scan', 'relaxed_order', true);
+    exception when others then
+        null;  -- pgvector < 0.8: no iterative scans, ef_search alone applies
+    end;
+
+    -- relaxed_order may yield rows slightly out of order; re-sort the result
+    return query
+    with candidates as materialized (
+        select
+            m.id,
+            m.content,
+            m.embedding <=> query_embedding as distance
+        from messages m
+        where m.group_id = p_group_id
+          and m.embedding is not null
+        order by m.embedding <=> query_embedding
+        limit match_count
+    )
+    select c.id, c.content, (1 - c.distance)::float as similarity
+    from candidates c
+    where 1 - c.distance >= match_threshold
+    order by c.distance;
+end;
+$$;
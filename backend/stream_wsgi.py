@@ -0,0 +1,15 @@
+"""
+WSGI entrypoint for the stream server, which only serves the message routes
+and is meant for /api/messages/stream:
+
+    WSGI_APP=stream_wsgi:app WEB_WORKER_CLASS=gevent gunicorn -c gunicorn.conf.py
+
+On gevent workers each open stream is a greenlet instead of a thread, so one
+process holds WEB_WORKER_CONNECTIONS clients. The API server keeps gthread
+workers (bcrypt and the ingestion pools would block a gevent hub), and the
+reverse proxy sends /api/messages/stream here. Set DATABASE_URL on both, so
+messages sent through the API reach these streams.
+"""
+from run import create_stream_app
+
+app = create_stream_app()
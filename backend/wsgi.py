@@ -0,0 +1,11 @@
+"""
+WSGI entrypoint for production servers:
+
+    gunicorn -c gunicorn.conf.py
+
+Each worker process imports this module after forking, so its Supabase
+session, Gemini channel and background threads belong to that worker.
+"""
+from run import create_app
+
+app = create_app()
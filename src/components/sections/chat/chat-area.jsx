@@ -39,6 +39,11 @@ export function ChatArea({ selectedGroup }) {
   const [error, setError] = useState(null);
   const [sidebarOpen, setSidebarOpen] = useState(true);
   const [uploading, setUploading] = useState(false); // Added uploading state
+  const latestCursorRef = useRef(null); // Keyset cursor of the newest loaded message
+  const [earliestCursor, setEarliestCursor] = useState(null); // Cursor of the oldest loaded message
+  const [hasEarlier, setHasEarlier] = useState(false);
+  const [loadingEarlier, setLoadingEarlier] = useState(false);
+  const keepScrollRef = useRef(false); // Set while prepending history, so we don't jump to the bottom
 
   const router = useRouter(); // Initialize useRouter
 
@@ -53,7 +58,10 @@ export function ChatArea({ selectedGroup }) {
         throw new Error("Failed to fetch messages");
       }
       const data = await response.json();
-      setMessages(data);
+      latestCursorRef.current = data.after;
+      setEarliestCursor(data.before);
+      setHasEarlier(data.has_more);
+      setMessages(data.messages);
     } catch (err) {
       setError(err.message);
       console.error("Error fetching messages:", err);
@@ -61,6 +69,32 @@ export function ChatArea({ selectedGroup }) {
       setLoading(false);
     }
   };
+
+  // Pages back through history with the before= cursor of the oldest loaded message
+  const fetchEarlierMessages = async () => {
+    if (!selectedGroup || !earliestCursor || loadingEarlier) return;
+    setLoadingEarlier(true);
+    try {
+      const response = await fetch(
+        `http://localhost:5000/api/messages/fetch/${selectedGroup.id}?before=${encodeURIComponent(earliestCursor)}`
+      );
+      if (!response.ok) {
+        throw new Error("Failed to fetch earlier messages");
+      }
+      const data = await response.json();
+      setEarliestCursor(data.before);
+      setHasEarlier(data.has_more);
+      keepScrollRef.current = true;
+      setMessages((prevMessages) => {
+        const known = new Set(prevMessages.map((message) => message.id));
+        return [...data.messages.filter((message) => !known.has(message.id)), ...prevMessages];
+      });
+    } catch (err) {
+      console.error("Error fetching earlier messages:", err);
+    } finally {
+      setLoadingEarlier(false);
+    }
+  };
   const handleFileUpload = async (file, groupId, senderId, senderRole) => {
     setUploading(true); // Set uploading to true when file upload starts
     try {
@@ -92,6 +126,15 @@ export function ChatArea({ selectedGroup }) {
     }
   };
 
+  // Messages can arrive both from the stream and from our own send; keep one copy
+  const appendMessages = (incoming) => {
+    setMessages((prevMessages) => {
+      const known = new Set(prevMessages.map((message) => message.id));
+      const fresh = incoming.filter((message) => !known.has(message.id));
+      return fresh.length ? [...prevMessages, ...fresh] : prevMessages;
+    });
+  };
+
   const handleSendMessage = async () => {
     if (!newMessage.trim() || !selectedGroup) return;
 
@@ -100,14 +143,6 @@ export function ChatArea({ selectedGroup }) {
     const userRole = user["role"];
 
     try {
-      const res = await fetch(
-        `http://localhost:5000/api/messages/fetch/${selectedGroup}`
-      );
-      if (!res.ok) {
-        throw new Error("Failed to fetch messages");
-      }
-      const dat = await res.json();
-      setMessages(dat);
       const response = await fetch("http://localhost:5000/api/messages/send", {
         method: "POST",
         headers: {
@@ -140,7 +175,7 @@ export function ChatArea({ selectedGroup }) {
         sender_avatar: "https://thispersondoesnotexist.com/",
       };
 
-      setMessages((prevMessages) => [...prevMessages, message]);
+      appendMessages([message]);
       setNewMessage("");
     } catch (err) {
       setError(err.message);
@@ -154,7 +189,35 @@ export function ChatArea({ selectedGroup }) {
     }
   }, [selectedGroup]);
 
+  // Live updates: the server pushes new group messages, replaying anything
+  // after our newest cursor on (re)connect.
   useEffect(() => {
+    if (!selectedGroup || loading) return;
+
+    const since = latestCursorRef.current
+      ? `?since=${encodeURIComponent(latestCursorRef.current)}`
+      : "";
+    const source = new EventSource(
+      `http://localhost:5000/api/messages/stream/${selectedGroup.id}${since}`
+    );
+    source.addEventListener("message", (event) => {
+      latestCursorRef.current = event.lastEventId;
+      appendMessages([JSON.parse(event.data)]);
+    });
+    // Too much was missed to replay; reload the transcript, which reconnects
+    source.addEventListener("resync", () => {
+      source.close();
+      fetchMessages(selectedGroup.id);
+    });
+
+    return () => source.close();
+  }, [selectedGroup, loading]);
+
+  useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     if (messagesEndRef.current) {
       messagesEndRef.current.scrollIntoView({ behavior: "smooth" });
     }
@@ -385,6 +448,18 @@ export function ChatArea({ selectedGroup }) {
         <div className="flex-1 flex flex-col h-full">
           <ScrollArea className="flex-1 px-4 py-6" ref={scrollAreaRef}>
             <div className="space-y-6 max-w-3xl mx-auto">
+              {hasEarlier && (
+                <div className="flex justify-center">
+                  <Button
+                    variant="outline"
+                    size="sm"
+                    onClick={fetchEarlierMessages}
+                    disabled={loadingEarlier}
+                  >
+                    {loadingEarlier ? "Loading..." : "Load earlier messages"}
+                  </Button>
+                </div>
+              )}
               {Object.keys(messageGroups).map((date) => (
                 <div key={date} className="space-y-4">
                   <div className="flex justify-center">
@@ -12,6 +12,7 @@ import {
 } from "@/components/ui/card";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
 import { MainSkeleton } from "@/components/skeletons/main-skeleton";
+import { authHeaders } from "@/lib/utils";
 
 export default function ChatLayout({ groupId }) {
   
@@ -66,7 +67,8 @@ export default function ChatLayout({ groupId }) {
   const fetchTeacherGroups = async (userId) => {
     try {
       const response = await fetch(
-        `http://localhost:5000/api/groups/teacher-groups?user_id=${userId}`
+        `http://localhost:5000/api/groups/teacher-groups?user_id=${userId}`,
+        { headers: authHeaders() }
       );
 
       if (!response.ok) {
@@ -98,7 +100,8 @@ export default function ChatLayout({ groupId }) {
   const fetchStudentGroups = async (userId) => {
     try {
       const response = await fetch(
-        `http://localhost:5000/api/groups/student-groups?user_id=${userId}`
+        `http://localhost:5000/api/groups/student-groups?user_id=${userId}`,
+        { headers: authHeaders() }
       );
 
       if (!response.ok) {
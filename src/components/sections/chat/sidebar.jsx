@@ -43,6 +43,7 @@ import { useToast } from "@/hooks/use-toast";
 import { useRouter } from "next/navigation";
 import { Input } from "@/components/ui/input";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs"; //Imported Tabs for the Group Join Section.
+import { authHeaders } from "@/lib/utils"
 
 // Dummy subject data (replace with your actual data if needed)
 const subjectData = [
@@ -184,6 +185,7 @@ export function Sidebar({ groups, onGroupSelect }) {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          ...authHeaders(),
         },
         body: JSON.stringify(groupData),
       });
@@ -236,6 +238,7 @@ export function Sidebar({ groups, onGroupSelect }) {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
+            ...authHeaders(),
           },
           body: JSON.stringify({ student_id: userId }),
         }
@@ -4,3 +4,9 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// Session token issued by /api/auth/login; the API resolves the user from it
+export function authHeaders() {
+  const token = typeof window !== "undefined" ? sessionStorage.getItem("token") : null;
+  return token ? { Authorization: `Bearer ${token}` } : {};
+}